@@ -7,85 +7,331 @@ Package for translating EPUB books while preserving formatting and images.
 Features checkpoint support for resumable processing and detailed progress reporting.
 """
 
+import atexit
+import functools
+import importlib
+import importlib.util
 import logging
+import logging.handlers
 import sys
 import os
+import weakref
 
 __version__ = "0.2.0"
 __author__ = "Epub Translator Team"
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[logging.StreamHandler()]
+# Configure logging for the package's loggers only. Records are buffered and
+# written to stderr in chunks, immediately for warnings and errors, until the
+# application configures the root logger; after that they propagate to its
+# handlers instead. Only warnings and errors are logged unless
+# enable_verbose() is called.
+_log_handler = logging.handlers.MemoryHandler(
+    capacity=100,
+    flushLevel=logging.WARNING,
+    target=logging.StreamHandler()
 )
+_log_handler.target.setFormatter(
+    logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+)
+_log_handler.addFilter(lambda record: not logging.getLogger().handlers)
+atexit.register(_log_handler.flush)
+_package_logger = logging.getLogger("epub_translator")
+_package_logger.addHandler(_log_handler)
+_package_logger.setLevel(logging.WARNING)
 
-# Check for checkpoint support modules
-CHECKPOINT_SUPPORT = False
-try:
-    from .checkpoint_manager import CheckpointManager
-    from .progress_tracker import ProgressTracker
-    from .content_manager import ContentManager
-    from .paragraph_divider import TextDivider
-    CHECKPOINT_SUPPORT = True
-except ImportError:
-    pass
-
-# Fix for circular imports - defer actual imports
-def get_translator(config):
+def enable_verbose(level=logging.INFO):
+    """Log the package's progress messages.
+    
+    Args:
+        level: Lowest level to log for the package's loggers (default: INFO)
+    """
+    logging.getLogger("epub_translator").setLevel(level)
+
+# Configuration has no third-party dependencies, so it is imported eagerly
+from .config import Config, Settings
+
+# Public classes, imported from their submodule on first access (PEP 562)
+_LAZY_ATTRS = {
+    "DeepseekTranslator": ".translator",
+    "TerminologyExtractor": ".term_extractor",
+    "EPUBProcessor": ".epub_processor",
+    "CheckpointManager": ".checkpoint_manager",
+    "ProgressTracker": ".progress_tracker",
+    "ContentManager": ".content_manager",
+    "TextDivider": ".paragraph_divider",
+}
+
+__all__ = [
+    "get_translator",
+    "get_term_extractor",
+    "get_processor",
+    "Services",
+    "build_services",
+    "clear_factory_cache",
+    "has_checkpoint_support",
+    "enable_verbose",
+    "create_checkpoint_manager",
+    "create_progress_tracker",
+    "create_content_manager",
+    "Config",
+    "Settings",
+] + list(_LAZY_ATTRS)
+
+# Modules checkpoint support needs, located without being imported
+_CHECKPOINT_MODULES = (
+    ".checkpoint_manager",
+    ".progress_tracker",
+    ".content_manager",
+    ".paragraph_divider",
+    "lxml",
+)
+
+# Result of the checkpoint support probe, None until first checked
+_checkpoint_support = None
+
+@functools.lru_cache(maxsize=None)
+def _load_class(name):
+    """Import a public class from its submodule."""
+    module = importlib.import_module(_LAZY_ATTRS[name], __name__)
+    return getattr(module, name)
+
+def __getattr__(name):
+    if name in _LAZY_ATTRS:
+        value = _load_class(name)
+        globals()[name] = value
+        return value
+    if name == "CHECKPOINT_SUPPORT":
+        return has_checkpoint_support()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Settings already read from a config object, keyed by the config itself
+_settings_cache = weakref.WeakKeyDictionary()
+
+def _get_settings(config):
+    """Get the factory settings for a configuration.
+    
+    Settings are read from a config only once for as long as its revision
+    is unchanged, so calling several factories with the same config only
+    reads it once. Settings instances are returned as they are.
+    
+    Args:
+        config: Config or Settings instance
+    
+    Returns:
+        Settings instance
+    """
+    if isinstance(config, Settings):
+        return config
+    
+    revision = getattr(config, "revision", None)
+    if revision is not None:
+        cached = _settings_cache.get(config)
+        if cached is not None and cached[0] == revision:
+            return cached[1]
+    
+    settings = Settings.from_config(config)
+    
+    if revision is not None:
+        _settings_cache[config] = (revision, settings)
+    return settings
+
+# HTTP session shared by every translator the factory builds
+_http_session = None
+
+def _get_http_session(pool_size):
+    """Get the pooled HTTP session used for Deepseek API calls.
+    
+    Args:
+        pool_size: Number of connections to keep alive
+    
+    Returns:
+        requests.Session instance
+    """
+    global _http_session
+    if _http_session is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        atexit.register(session.close)
+        _http_session = session
+    return _http_session
+
+@functools.lru_cache(maxsize=None)
+def _get_rate_limiter(rate_limit):
+    """Get the rate limiter shared by all translators with this limit.
+    
+    Args:
+        rate_limit: Maximum requests per minute
+    
+    Returns:
+        RateLimiter instance
+    """
+    from .translator import RateLimiter
+    return RateLimiter(rate_limit)
+
+# The translator and extractor modules pull in third-party packages, so they
+# are imported when the first instance is built (cache misses only)
+@functools.lru_cache(maxsize=None)
+def _build_translator(api_key, source_lang, target_lang, model, max_retries,
+                      timeout, rate_limit, texts_per_request, session):
     from .translator import DeepseekTranslator
     return DeepseekTranslator(
-        api_key=config.get("deepseek", "api_key"),
-        source_lang=config.get("translation", "source_lang", fallback="en"),
-        target_lang=config.get("translation", "target_lang", fallback="zh-CN"),
-        model=config.get("deepseek", "model"),
-        max_retries=config.getint("deepseek", "max_retries"),
-        timeout=config.getint("deepseek", "timeout"), 
-        rate_limit=config.getint("deepseek", "rate_limit")
+        api_key=api_key,
+        source_lang=source_lang,
+        target_lang=target_lang,
+        model=model,
+        max_retries=max_retries,
+        timeout=timeout,
+        rate_limit=rate_limit,
+        session=session,
+        rate_limiter=_get_rate_limiter(rate_limit),
+        texts_per_request=texts_per_request
     )
 
-def get_term_extractor(config, translator=None, checkpoint_manager=None):
+@functools.lru_cache(maxsize=None)
+def _build_term_extractor(translator, workdir, use_deepseek):
     from .term_extractor import TerminologyExtractor
+    return TerminologyExtractor(
+        translator=translator,
+        workdir=workdir,
+        use_deepseek=use_deepseek
+    )
+
+def clear_factory_cache():
+    """Forget the translators and terminology extractors built so far."""
+    _build_translator.cache_clear()
+    _build_term_extractor.cache_clear()
+
+def get_translator(config):
+    """Get the translator for a configuration.
+    
+    Translators are cached by their option values, so repeated calls with
+    an unchanged configuration return the same instance. All of them send
+    their requests through one pooled HTTP session, paced by a rate limiter
+    shared per rate limit.
+    
+    Args:
+        config: Config or Settings instance
+    
+    Returns:
+        DeepseekTranslator instance
+    """
+    settings = _get_settings(config)
+    return _build_translator(
+        settings.api_key,
+        settings.source_lang,
+        settings.target_lang,
+        settings.model,
+        settings.max_retries,
+        settings.timeout,
+        settings.rate_limit,
+        settings.texts_per_request,
+        _get_http_session(max(settings.max_workers or 1, 10))
+    )
+
+def get_term_extractor(config, translator=None, checkpoint_manager=None):
+    """Get the terminology extractor for a configuration.
+    
+    Extractors are cached by translator, working directory and options.
+    Without a checkpoint manager there is no working directory to tell books
+    apart, so a new extractor is built, keeping no terms from earlier books.
+    
+    Args:
+        config: Config or Settings instance
+        translator: Translator instance (optional)
+        checkpoint_manager: CheckpointManager instance (optional)
+    
+    Returns:
+        TerminologyExtractor instance
+    """
+    settings = _get_settings(config)
     
     # Get workdir from checkpoint manager if available
     workdir = None
     if checkpoint_manager is not None:
         workdir = checkpoint_manager.workdir
     
-    # Create terminology extractor with new interface
-    term_extractor = TerminologyExtractor(
-        translator=translator,
-        workdir=workdir,
-        min_frequency=config.getint("terminology", "min_term_frequency", fallback=3),
-        max_term_length=config.getint("terminology", "max_term_length", fallback=5),
-        ignore_case=config.getboolean("terminology", "ignore_case", fallback=True),
-        use_deepseek=config.getboolean("terminology", "use_deepseek", fallback=True)
-    )
-    
-    return term_extractor
+    if workdir is None:
+        return _build_term_extractor.__wrapped__(translator, None, settings.use_deepseek)
+    return _build_term_extractor(translator, workdir, settings.use_deepseek)
 
 def get_processor(config, translator, term_extractor):
-    from .epub_processor import EPUBProcessor
-    processor = EPUBProcessor(
+    """Create an EPUB processor.
+    
+    Not cached: a processor carries per-run counters and signal handlers.
+    
+    Args:
+        config: Config or Settings instance. Checkpoints only record the
+            processing configuration when a Config is given.
+        translator: Translator instance
+        term_extractor: TerminologyExtractor instance
+    
+    Returns:
+        EPUBProcessor instance
+    """
+    settings = _get_settings(config)
+    processor = _load_class("EPUBProcessor")(
         translator=translator,
         term_extractor=term_extractor,
-        batch_size=config.getint("processing", "batch_size"),
-        auto_extract_terms=config.getboolean("terminology", "enable_auto_extraction"),
-        max_workers=config.getint("processing", "max_parallel_requests"),
-        chunk_size=config.getint("processing", "chunk_size", fallback=5000),
-        config=config
+        batch_size=settings.batch_size,
+        auto_extract_terms=settings.auto_extract_terms,
+        max_workers=settings.max_workers,
+        chunk_size=settings.chunk_size,
+        config=None if isinstance(config, Settings) else config,
+        max_batch_chars=settings.max_batch_chars
     )
     
     return processor
 
+class Services:
+    """Translator, terminology extractor and processor built for one run."""
+    
+    __slots__ = ("translator", "term_extractor", "processor")
+    
+    def __init__(self, translator, term_extractor, processor):
+        object.__setattr__(self, "translator", translator)
+        object.__setattr__(self, "term_extractor", term_extractor)
+        object.__setattr__(self, "processor", processor)
+    
+    def __setattr__(self, name, value):
+        raise AttributeError("Services are read-only")
+
+def build_services(config, checkpoint_manager=None):
+    """Build the translator, terminology extractor and processor together.
+    
+    Args:
+        config: Config or Settings instance
+        checkpoint_manager: CheckpointManager instance (optional)
+    
+    Returns:
+        Services instance
+    """
+    settings = _get_settings(config)
+    translator = get_translator(settings)
+    term_extractor = get_term_extractor(settings, translator, checkpoint_manager)
+    processor = get_processor(config, translator, term_extractor)
+    return Services(translator, term_extractor, processor)
+
 def has_checkpoint_support():
     """Check if checkpoint support is available.
     
+    The checkpoint modules and their third-party dependencies are only
+    located, not imported, and only on the first call; the result is cached
+    for subsequent calls.
+    
     Returns:
         True if checkpoint support is available, False otherwise
     """
-    return CHECKPOINT_SUPPORT
+    global _checkpoint_support
+    if _checkpoint_support is None:
+        _checkpoint_support = all(
+            importlib.util.find_spec(name, __name__) is not None
+            for name in _CHECKPOINT_MODULES
+        )
+    return _checkpoint_support
 
 def create_checkpoint_manager(input_path, output_path, config=None):
     """Create a checkpoint manager.
@@ -98,10 +344,10 @@ def create_checkpoint_manager(input_path, output_path, config=None):
     Returns:
         CheckpointManager instance or None if not supported
     """
-    if not CHECKPOINT_SUPPORT:
+    if not has_checkpoint_support():
         return None
-        
-    return CheckpointManager(input_path, output_path, config)
+    
+    return _load_class("CheckpointManager")(input_path, output_path, config)
 
 def create_progress_tracker(checkpoint_manager=None):
     """Create a progress tracker.
@@ -112,21 +358,22 @@ def create_progress_tracker(checkpoint_manager=None):
     Returns:
         ProgressTracker instance or None if not supported
     """
-    if not CHECKPOINT_SUPPORT:
+    if not has_checkpoint_support():
         return None
-        
-    return ProgressTracker(checkpoint_manager)
+    
+    return _load_class("ProgressTracker")(checkpoint_manager)
 
-def create_content_manager(workdir):
+def create_content_manager(workdir, config=None):
     """Create a content manager.
     
     Args:
         workdir: Working directory
+        config: Configuration object (optional)
     
     Returns:
         ContentManager instance or None if not supported
     """
-    if not CHECKPOINT_SUPPORT:
+    if not has_checkpoint_support():
         return None
-        
-    return ContentManager(workdir)
+    
+    return _load_class("ContentManager")(workdir, config)
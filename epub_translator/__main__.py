@@ -0,0 +1,11 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Entry point for running the package with ``python -m epub_translator``.
+"""
+
+from .main import main
+
+if __name__ == "__main__":
+    main()
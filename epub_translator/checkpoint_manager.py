@@ -10,16 +10,189 @@ with resume capability.
 import os
 import json
 import time
+import atexit
 import logging
 import hashlib
+import mmap
+import pickle
 import shutil
+import struct
+import tempfile
+import threading
 from datetime import datetime
 
 logger = logging.getLogger("epub_translator.checkpoint_manager")
 
+# orjson is optional; it encodes and decodes checkpoint files much faster
+try:
+    import orjson
+    ORJSON_SUPPORT = True
+except ImportError:
+    ORJSON_SUPPORT = False
+
+def _write_file(path, content):
+    """Write bytes to a file atomically.
+    
+    The content is written to a uniquely named temporary file in the same
+    directory and synced to disk before it replaces the target, so a crash
+    never leaves a half-written file and concurrent writers do not clash.
+    
+    Args:
+        path: Path to the file
+        content: Bytes to write
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".",
+                                    prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+def _write_json(path, data):
+    """Write data to a JSON file atomically.
+    
+    Args:
+        path: Path to the JSON file
+        data: JSON-serializable data
+    """
+    if ORJSON_SUPPORT:
+        content = orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    else:
+        content = json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+    _write_file(path, content)
+
+def _read_json(path):
+    """Read data from a JSON file.
+    
+    Args:
+        path: Path to the JSON file
+        
+    Returns:
+        Decoded data
+    """
+    if ORJSON_SUPPORT:
+        with open(path, 'rb') as f:
+            return orjson.loads(f.read())
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def _cfg_get(config, section, option, default, cast=str):
+    """Read a configuration value, falling back to a default.
+    
+    Args:
+        config: Configuration object with a get(section, option, fallback) method
+        section: Configuration section
+        option: Option name
+        default: Value returned when the option is missing or invalid
+        cast: Type to convert the value to (str, int or bool)
+        
+    Returns:
+        Converted option value or default
+    """
+    try:
+        value = config.get(section, option, default)
+        if value is None:
+            return default
+        if cast is bool and not isinstance(value, bool):
+            return str(value).strip().lower() in ("1", "yes", "true", "on")
+        return cast(value)
+    except Exception:
+        return default
+
+def _now_iso():
+    """Get the current local time as an ISO 8601 string, to the second."""
+    return datetime.now().isoformat(timespec='seconds')
+
+def _dir_nonempty(path):
+    """Check whether a directory has at least one entry, without listing it.
+    
+    Args:
+        path: Path to the directory
+        
+    Returns:
+        True if the directory has an entry, False otherwise
+    """
+    with os.scandir(path) as entries:
+        return next(entries, None) is not None
+
+_MISSING = object()
+
+def _toc_tuple_fields(entry):
+    """Get (title, href, children) of a (title, href[, children]) TOC tuple."""
+    if len(entry) < 2:
+        return str(entry), "#", None
+    return str(entry[0]), str(entry[1]), entry[2] if len(entry) > 2 else None
+
+def _toc_object_fields(entry):
+    """Get (title, href, children) of a TOC entry object (Link, Section, ...)."""
+    title = getattr(entry, 'title', _MISSING)
+    href = getattr(entry, 'href', _MISSING)
+    if title is not _MISSING and href is not _MISSING:
+        # ebooklib TOC entry object
+        return str(title), str(href), getattr(entry, 'children', None)
+    
+    if not hasattr(entry, '__dict__'):
+        # Fallback for any other type
+        return str(entry), "#", None
+    
+    # Generic object with attributes - handle Section or other custom types
+    if title is _MISSING:
+        title = getattr(entry, 'name', _MISSING)
+    if title is _MISSING:
+        title = entry
+    if href is _MISSING:
+        href = getattr(entry, 'file_name', "#")
+    children = getattr(entry, 'children', None) or getattr(entry, 'subitems', None)
+    return str(title), str(href), children
+
+# TOC entry handlers by exact type, anything else is treated as an object
+_TOC_HANDLERS = {
+    tuple: _toc_tuple_fields,
+}
+
 class CheckpointManager:
     """Manages translation checkpoints for resumable processing."""
     
+    # hashlib algorithm used to fingerprint the source file
+    HASH_ALGO = "blake2b"
+    
+    # Minimum seconds between checkpoint writes for routine progress updates
+    FLUSH_INTERVAL = 0.5
+    
+    # Directories already created by any checkpoint manager in this process
+    _ensured_dirs = set()
+    
+    # File digests computed in this process: (path, algo) -> (stat, digest)
+    _hash_cache = {}
+    
+    # Configuration recorded in the checkpoint: (key, section, option, default, type)
+    CONFIG_FIELDS = (
+        ("batch_size", "processing", "batch_size", 10, int),
+        ("max_workers", "processing", "max_parallel_requests", 4, int),
+        ("chunk_size", "processing", "chunk_size", 5000, int),
+        ("use_optimized_translator", "processing", "use_optimized_translator", True, bool),
+        ("max_tokens", "processing", "max_tokens", 4000, int),
+        ("source_lang", "translation", "source_lang", "en", str),
+        ("target_lang", "translation", "target_lang", "zh-CN", str),
+    )
+    
+    # Weight of each phase in the total progress, with the counters used for
+    # partial progress of an unfinished phase: (phase, weight, done, total)
+    PHASE_WEIGHTS = (
+        ("terminology", 0.05, None, None),
+        ("preprocessing", 0.05, "items_processed", "items_total"),
+        ("translation", 0.85, "translated_chars", "total_chars"),
+        ("postprocessing", 0.05, None, None),
+    )
+    
     def __init__(self, input_path, output_path, config=None):
         """Initialize checkpoint manager.
         
@@ -37,13 +210,22 @@ class CheckpointManager:
         self.workdir = f"{self.base_name}_workdir"
         self.checkpoint_dir = f"{self.workdir}/checkpoint"
         
+        # Paths used on every save or batch, built once
+        self._status_file = f"{self.checkpoint_dir}/status.json"
+        self._ckpt_batches_dir = f"{self.checkpoint_dir}/batches"
+        self._work_batches_dir = f"{self.workdir}/batches"
+        
         # Initialize checkpoint state
+        now = _now_iso()
         self.state = {
             "source_file": input_path,
             "target_file": output_path,
-            "source_file_hash": self._calculate_file_hash(input_path),
-            "created_at": datetime.now().isoformat(),
-            "last_updated": datetime.now().isoformat(),
+            # Hashed on first save, see save_checkpoint()
+            "source_file_hash": None,
+            "hash_algo": self.HASH_ALGO,
+            "source_file_stat": self._get_file_stat(input_path),
+            "created_at": now,
+            "last_updated": now,
             "auto_resume_enabled": True,
             "total_progress": 0.0,
             "phases": {
@@ -78,8 +260,7 @@ class CheckpointManager:
                     "translated_chars": 0,
                     "total_chars": 0,
                     "batches_total": 0,
-                    "batches_completed": 0,
-                    "completed_batches": []
+                    "batches_completed": 0
                 },
                 "postprocessing": {
                     "completed": False
@@ -88,45 +269,127 @@ class CheckpointManager:
             "config": self._extract_config(config)
         }
         
+        self._rebind_phases()
+        
+        # Completed batch IDs are appended to a log file instead of being
+        # rewritten with the state on every save
+        self.completed_batches_log = f"{self.checkpoint_dir}/completed_batches.log"
+        self.completed_batches = set()
+        
+        # Batch statuses are appended to a single log; the index maps batch
+        # IDs to (offset, length) of their latest record and is built on
+        # first lookup
+        self.batch_status_log = f"{self.checkpoint_dir}/batch_status.log"
+        self._batch_index = None
+        self._batch_lock = threading.Lock()
+        
+        # Both logs are opened once for appending. Records are written
+        # straight through to the OS and synced to disk along with the
+        # checkpoint; a record torn by a crash is discarded on the next load.
+        self._batch_status_file = None
+        self._completed_batches_file = None
+        
+        # Progress updates only mark the state dirty; it is written at most
+        # every FLUSH_INTERVAL seconds, when a phase completes and at exit.
+        # The state lock guards the state, the dirty flag and the writes.
+        self._state_lock = threading.RLock()
+        self._dirty = False
+        self._last_flush = 0.0
+        atexit.register(self.flush)
+        
         # Create directories
         self._ensure_directories()
     
+    def _rebind_phases(self):
+        """Bind shortcuts to the phase dictionaries of the current state.
+        
+        Must be called whenever self.state is replaced.
+        """
+        self._phases = self.state["phases"]
+        self._ph_local = self._phases["local_processing"]
+        self._ph_trans = self._phases["translation"]
+    
     def _ensure_directories(self):
-        """Create necessary directories for checkpoints and work files."""
+        """Create the directories the checkpoint state is written to.
+        
+        The work file directories (html_items, chapters_*, batches) are
+        created by ContentManager, and checkpoint/batches on the first
+        batch file written to it.
+        """
         directories = [
             self.workdir,
-            self.checkpoint_dir,
-            f"{self.workdir}/html_items",
-            # terminology directory is no longer created in phase 1
-            f"{self.workdir}/chapters_original",
-            f"{self.workdir}/chapters_translated",
-            f"{self.workdir}/batches",
-            f"{self.checkpoint_dir}/batches"
+            self.checkpoint_dir
         ]
         
         for directory in directories:
-            os.makedirs(directory, exist_ok=True)
+            self._ensure_dir(directory)
+    
+    def _ensure_dir(self, directory):
+        """Create a directory unless it was already created in this process.
+        
+        Args:
+            directory: Path to the directory
+        """
+        if directory in self._ensured_dirs:
+            return
+        os.makedirs(directory, exist_ok=True)
+        self._ensured_dirs.add(directory)
     
-    def _calculate_file_hash(self, file_path):
-        """Calculate MD5 hash of a file.
+    def _calculate_file_hash(self, file_path, algo=None):
+        """Calculate the hash of a file.
         
         Args:
             file_path: Path to the file
+            algo: hashlib algorithm name (default: HASH_ALGO)
             
         Returns:
-            MD5 hash string
+            Hex digest string
         """
-        if not os.path.exists(file_path):
+        file_stat = self._get_file_stat(file_path)
+        if file_stat is None:
             return None
+        
+        # Reuse the digest computed for an unchanged file earlier in this process
+        algo = algo or self.HASH_ALGO
+        cache_key = (os.path.abspath(file_path), algo)
+        cached = self._hash_cache.get(cache_key)
+        if cached is not None and cached[0] == file_stat:
+            return cached[1]
             
-        hasher = hashlib.md5()
+        hasher = hashlib.new(algo)
         with open(file_path, 'rb') as f:
-            buf = f.read(65536)  # Read in 64k chunks
-            while buf:
-                hasher.update(buf)
-                buf = f.read(65536)
+            try:
+                # Hash the whole memory-mapped file in a single update
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    hasher.update(mm)
+            except (ValueError, OverflowError, OSError):
+                # Empty files and files too large to map on 32-bit systems
+                buf = f.read(1048576)  # Read in 1M chunks
+                while buf:
+                    hasher.update(buf)
+                    buf = f.read(1048576)
+        
+        digest = hasher.hexdigest()
+        self._hash_cache[cache_key] = (file_stat, digest)
+        return digest
+    
+    def _get_file_stat(self, file_path):
+        """Get the size, modification time and inode of a file.
+        
+        A file whose stat is unchanged since the checkpoint was saved is
+        assumed to be unchanged, without rehashing its contents.
         
-        return hasher.hexdigest()
+        Args:
+            file_path: Path to the file
+            
+        Returns:
+            Dictionary with size, mtime_ns and ino, or None if the file is missing
+        """
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            return None
+        return {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "ino": st.st_ino}
     
     def _extract_config(self, config):
         """Extract relevant configuration parameters.
@@ -141,17 +404,10 @@ class CheckpointManager:
             return {}
             
         # Extract parameters that affect batch processing
-        config_dict = {
-            "batch_size": getattr(config, "get", lambda x, y, z: 10)("processing", "batch_size", 10),
-            "max_workers": getattr(config, "get", lambda x, y, z: 4)("processing", "max_parallel_requests", 4),
-            "chunk_size": getattr(config, "get", lambda x, y, z: 5000)("processing", "chunk_size", 5000),
-            "use_optimized_translator": getattr(config, "getboolean", lambda x, y, z: True)("processing", "use_optimized_translator", True),
-            "max_tokens": getattr(config, "getint", lambda x, y, z: 4000)("processing", "max_tokens", 4000),
-            "source_lang": getattr(config, "get", lambda x, y, z: "en")("translation", "source_lang", "en"),
-            "target_lang": getattr(config, "get", lambda x, y, z: "zh-CN")("translation", "target_lang", "zh-CN")
+        return {
+            key: _cfg_get(config, section, option, default, cast)
+            for key, section, option, default, cast in self.CONFIG_FIELDS
         }
-        
-        return config_dict
     
     def check_existing_checkpoint(self):
         """Check if a checkpoint exists for the input file.
@@ -159,29 +415,37 @@ class CheckpointManager:
         Returns:
             Tuple (exists, valid): Whether checkpoint exists and is valid
         """
-        checkpoint_file = f"{self.checkpoint_dir}/status.json"
+        checkpoint_file = self._status_file
         
         if not os.path.exists(checkpoint_file):
             return False, False
         
         try:
-            with open(checkpoint_file, 'r', encoding='utf-8') as f:
-                checkpoint = json.load(f)
-            
-            # Check if source file has changed
-            current_hash = self._calculate_file_hash(self.input_path)
-            saved_hash = checkpoint.get("source_file_hash")
+            checkpoint = _read_json(checkpoint_file)
             
-            if current_hash != saved_hash:
-                logger.warning("Source file has changed since last checkpoint")
-                return True, False
+            # Check if source file has changed; the content is only hashed
+            # when its size, modification time or inode differ
+            current_stat = self._get_file_stat(self.input_path)
+            if current_stat is None or current_stat != checkpoint.get("source_file_stat"):
+                # Use the checkpoint's algorithm (checkpoints written before
+                # hash_algo was recorded used MD5)
+                hash_algo = checkpoint.get("hash_algo", "md5")
+                current_hash = self._calculate_file_hash(self.input_path, hash_algo)
+                saved_hash = checkpoint.get("source_file_hash")
+                
+                if current_hash != saved_hash:
+                    logger.warning("Source file has changed since last checkpoint")
+                    return True, False
+                
+                # Same content, remember the new stat for the next check
+                checkpoint["source_file_stat"] = current_stat
             
             # Verify the workdir and key directories exist
             required_dirs = [
                 self.workdir,
                 self.checkpoint_dir,
                 f"{self.workdir}/html_items",
-                f"{self.workdir}/batches",
+                self._work_batches_dir,
                 f"{self.workdir}/chapters_original"
             ]
             
@@ -193,33 +457,86 @@ class CheckpointManager:
             # Check if batch files exist for phases marked as completed
             if checkpoint["phases"]["local_processing"].get("batch_division_completed", False):
                 # Check for at least one batch file
-                batch_files = os.listdir(f"{self.workdir}/batches")
-                if not batch_files:
+                if not _dir_nonempty(self._work_batches_dir):
                     logger.warning("Batch division marked as completed but no batch files found")
                     return True, False
             
             # Update state with loaded checkpoint
             self.state = checkpoint
+            self._rebind_phases()
+            self._load_completed_batches()
             return True, True
         
         except Exception as e:
             logger.error(f"Error loading checkpoint: {e}")
             return True, False
     
+    def _sync_batch_logs(self):
+        """Sync the batch status and completed batches logs to disk."""
+        with self._batch_lock:
+            files = [f for f in (self._batch_status_file, self._completed_batches_file)
+                     if f is not None]
+        for f in files:
+            try:
+                os.fsync(f.fileno())
+            except (OSError, ValueError):
+                # Closed by clear_checkpoint() in the meantime
+                pass
+    
+    def _close_batch_logs(self):
+        """Close the batch logs. Must be called with _batch_lock held."""
+        for f in (self._batch_status_file, self._completed_batches_file):
+            if f is not None:
+                f.close()
+        self._batch_status_file = None
+        self._completed_batches_file = None
+    
     def save_checkpoint(self):
-        """Save current state to checkpoint file."""
-        self.state["last_updated"] = datetime.now().isoformat()
+        """Save current state to checkpoint file.
         
-        checkpoint_file = f"{self.checkpoint_dir}/status.json"
-        try:
-            with open(checkpoint_file, 'w', encoding='utf-8') as f:
-                json.dump(self.state, f, indent=2, ensure_ascii=False)
+        The batch logs are synced first, so the state never counts batches
+        whose records could still be lost.
+        """
+        checkpoint_file = self._status_file
+        self._sync_batch_logs()
+        with self._state_lock:
+            self.state["last_updated"] = _now_iso()
+            if self.state.get("source_file_hash") is None:
+                self.state["source_file_hash"] = self._calculate_file_hash(
+                    self.input_path, self.state.get("hash_algo", self.HASH_ALGO))
             
-            logger.debug(f"Checkpoint saved to {checkpoint_file}")
+            try:
+                _write_json(checkpoint_file, self.state)
+                self._dirty = False
+                self._last_flush = time.monotonic()
+                
+                logger.debug(f"Checkpoint saved to {checkpoint_file}")
+                return True
+            except Exception as e:
+                logger.error(f"Error saving checkpoint: {e}")
+                return False
+    
+    def _mark_dirty(self):
+        """Record that the state has changes not yet written to disk."""
+        with self._state_lock:
+            self._dirty = True
+    
+    def _maybe_flush(self):
+        """Save the checkpoint if it is dirty and FLUSH_INTERVAL has passed."""
+        with self._state_lock:
+            if self._dirty and time.monotonic() - self._last_flush >= self.FLUSH_INTERVAL:
+                self.save_checkpoint()
+    
+    def flush(self):
+        """Save the checkpoint if it has unsaved changes.
+        
+        Returns:
+            Boolean indicating success
+        """
+        with self._state_lock:
+            if self._dirty:
+                return self.save_checkpoint()
             return True
-        except Exception as e:
-            logger.error(f"Error saving checkpoint: {e}")
-            return False
     
     def update_progress(self, phase, **kwargs):
         """Update progress for a specific phase.
@@ -228,58 +545,39 @@ class CheckpointManager:
             phase: Phase name (terminology, preprocessing, translation, postprocessing)
             **kwargs: Phase-specific progress information
         """
-        if phase not in self.state["phases"]:
+        if phase not in self._phases:
             logger.warning(f"Unknown phase: {phase}")
             return
         
-        # Update phase-specific progress
-        self.state["phases"][phase].update(kwargs)
-        
-        # Update total progress
-        self._calculate_total_progress()
-        
-        # Save checkpoint
-        self.save_checkpoint()
+        with self._state_lock:
+            # Update phase-specific progress
+            self._phases[phase].update(kwargs)
+            
+            # Update total progress
+            self._calculate_total_progress()
+            
+            # Save checkpoint right away when the phase completes, otherwise
+            # coalesce with other updates
+            self._mark_dirty()
+            if kwargs.get("completed"):
+                self.save_checkpoint()
+            else:
+                self._maybe_flush()
     
     def _calculate_total_progress(self):
         """Calculate overall progress percentage."""
-        phases = self.state["phases"]
-        
-        # Weight for each phase
-        weights = {
-            "terminology": 0.05,
-            "preprocessing": 0.05,
-            "translation": 0.85,
-            "postprocessing": 0.05
-        }
-        
+        phases = self._phases
         progress = 0.0
         
-        # Terminology phase
-        if phases["terminology"]["completed"]:
-            progress += weights["terminology"]
-        
-        # Preprocessing phase
-        if phases["preprocessing"]["completed"]:
-            progress += weights["preprocessing"]
-        else:
-            items_total = phases["preprocessing"].get("items_total", 1)
-            items_processed = phases["preprocessing"].get("items_processed", 0)
-            if items_total > 0:
-                progress += weights["preprocessing"] * (items_processed / items_total)
-        
-        # Translation phase
-        if phases["translation"]["completed"]:
-            progress += weights["translation"]
-        else:
-            chars_total = phases["translation"].get("total_chars", 1)
-            chars_translated = phases["translation"].get("translated_chars", 0)
-            if chars_total > 0:
-                progress += weights["translation"] * (chars_translated / chars_total)
-        
-        # Postprocessing phase
-        if phases["postprocessing"]["completed"]:
-            progress += weights["postprocessing"]
+        for phase_name, weight, done_key, total_key in self.PHASE_WEIGHTS:
+            phase = phases[phase_name]
+            if phase["completed"]:
+                progress += weight
+            elif done_key:
+                # Partial credit for phases that count their work
+                total = phase.get(total_key, 1)
+                if total > 0:
+                    progress += weight * min(1.0, phase.get(done_key, 0) / total)
         
         self.state["total_progress"] = min(100.0, progress * 100)
     
@@ -336,24 +634,25 @@ class CheckpointManager:
             completed: Whether step is completed
             **details: Additional details about the step
         """
-        if step_name not in self.state["phases"]["local_processing"]:
+        if step_name not in self._ph_local:
             logger.warning(f"Unknown local processing step: {step_name}")
             return False
             
-        # Update step status
-        self.state["phases"]["local_processing"][step_name] = completed
-        
-        # Update details if provided
-        if details:
-            # Ensure details dictionary exists
-            if "details" not in self.state["phases"]["local_processing"]:
-                self.state["phases"]["local_processing"]["details"] = {}
-                
-            # Add step-specific details
-            self.state["phases"]["local_processing"]["details"][step_name] = details
-        
-        # Save checkpoint
-        return self.save_checkpoint()
+        with self._state_lock:
+            # Update step status
+            self._ph_local[step_name] = completed
+            
+            # Update details if provided
+            if details:
+                # Ensure details dictionary exists
+                if "details" not in self._ph_local:
+                    self._ph_local["details"] = {}
+                    
+                # Add step-specific details
+                self._ph_local["details"][step_name] = details
+            
+            # Save checkpoint
+            return self.save_checkpoint()
     
     def is_local_processing_step_completed(self, step_name):
         """Check if a local processing step is completed.
@@ -373,14 +672,13 @@ class CheckpointManager:
             # Step-specific validation to ensure files exist
             if step_name == "batch_division_completed":
                 # Check if batches directory exists and has files
-                batches_dir = f"{self.workdir}/batches"
+                batches_dir = self._work_batches_dir
                 if not os.path.exists(batches_dir) or not os.path.isdir(batches_dir):
                     logger.warning(f"Batches directory does not exist, treating batch division as incomplete")
                     return False
                 
                 # Check if there are batch files
-                files = os.listdir(batches_dir)
-                if not files:
+                if not _dir_nonempty(batches_dir):
                     logger.warning(f"No batch files found, treating batch division as incomplete")
                     return False
             
@@ -393,7 +691,7 @@ class CheckpointManager:
                 
             
             # If all validation passes, check the state
-            return self.state["phases"]["local_processing"].get(step_name, False)
+            return self._ph_local.get(step_name, False)
         except Exception as e:
             logger.error(f"Error checking step completion: {e}")
             return False
@@ -408,13 +706,61 @@ class CheckpointManager:
             Dictionary with step details or all details if step_name is None
         """
         try:
-            details = self.state["phases"]["local_processing"].get("details", {})
+            details = self._ph_local.get("details", {})
             if step_name:
                 return details.get(step_name, {})
             return details
         except:
             return {} if step_name else {}
     
+    # Batch status log record header: batch ID length, pickled status length
+    _BATCH_RECORD_HEADER = struct.Struct(">II")
+    
+    # Longest batch ID accepted when reading the batch status log
+    _MAX_BATCH_ID_LEN = 4096
+    
+    def _build_batch_index(self):
+        """Index the batch status log by batch ID.
+        
+        A torn or corrupt record left by an interrupted write ends the log;
+        it is truncated there so that later appends stay readable. Must be
+        called with _batch_lock held.
+        
+        Returns:
+            Dictionary mapping batch IDs to (offset, length) of their status
+        """
+        index = {}
+        if not os.path.exists(self.batch_status_log):
+            return index
+        
+        header = self._BATCH_RECORD_HEADER
+        with open(self.batch_status_log, 'rb') as f:
+            data = f.read()
+        offset = 0
+        while offset + header.size <= len(data):
+            id_len, status_len = header.unpack_from(data, offset)
+            start = offset + header.size + id_len
+            if (not 0 < id_len <= self._MAX_BATCH_ID_LEN or status_len == 0
+                    or start + status_len > len(data)):
+                break
+            try:
+                batch_id = data[offset + header.size:start].decode('utf-8')
+            except UnicodeDecodeError:
+                break
+            index[batch_id] = (start, status_len)
+            offset = start + status_len
+        
+        if offset < len(data):
+            logger.warning(
+                f"Discarding {len(data) - offset} bytes of incomplete batch status "
+                f"at offset {offset} in {self.batch_status_log}"
+            )
+            with open(self.batch_status_log, 'r+b') as f:
+                f.truncate(offset)
+                f.flush()
+                os.fsync(f.fileno())
+        return index
+    
     def save_batch_status(self, batch_id, status_info):
         """Save status information for a batch.
         
@@ -426,33 +772,80 @@ class CheckpointManager:
             Boolean indicating success
         """
         try:
-            # Ensure batches directory exists
-            batches_dir = f"{self.checkpoint_dir}/batches"
-            os.makedirs(batches_dir, exist_ok=True)
-            
-            # Create batch status file path
-            status_file = f"{batches_dir}/batch_{batch_id}_status.json"
+            # Status is machine-only, so it is pickled rather than JSON
+            encoded_id = str(batch_id).encode('utf-8')
+            status = pickle.dumps(status_info, pickle.HIGHEST_PROTOCOL)
+            header = self._BATCH_RECORD_HEADER.pack(len(encoded_id), len(status))
             
-            # Save status information
-            with open(status_file, 'w', encoding='utf-8') as f:
-                json.dump(status_info, f, indent=2, ensure_ascii=False)
+            with self._batch_lock:
+                if self._batch_index is None:
+                    self._batch_index = self._build_batch_index()
+                if self._batch_status_file is None:
+                    self._batch_status_file = open(self.batch_status_log, 'ab', buffering=0)
                 
-            # Update batch in completed_batches list if completed
-            if status_info.get("translation_completed", False):
-                completed_batches = self.state["phases"]["translation"].get("completed_batches", [])
-                if batch_id not in completed_batches:
-                    completed_batches.append(batch_id)
-                    self.state["phases"]["translation"]["completed_batches"] = completed_batches
-                    self.state["phases"]["translation"]["batches_completed"] = len(completed_batches)
+                # Append the record to the batch status log
+                f = self._batch_status_file
+                offset = f.seek(0, os.SEEK_END)
+                f.write(header + encoded_id + status)
+                self._batch_index[batch_id] = (offset + len(header) + len(encoded_id), len(status))
                 
-            # Save overall checkpoint
-            self.save_checkpoint()
+                # Record the batch in the completed batches log if completed
+                newly_completed = False
+                if status_info.get("translation_completed", False):
+                    if batch_id not in self.completed_batches:
+                        if self._completed_batches_file is None:
+                            self._completed_batches_file = open(
+                                self.completed_batches_log, 'ab', buffering=0)
+                        self._completed_batches_file.write(f"{batch_id}\n".encode('utf-8'))
+                        self.completed_batches.add(batch_id)
+                        newly_completed = True
+            
+            # Save overall checkpoint, coalesced with other updates; the
+            # logs are synced then, outside the batch lock
+            with self._state_lock:
+                if newly_completed:
+                    self._ph_trans["batches_completed"] = len(self.completed_batches)
+                self._mark_dirty()
+                self._maybe_flush()
             
             return True
         except Exception as e:
             logger.error(f"Error saving batch status for {batch_id}: {e}")
             return False
     
+    def _load_completed_batches(self):
+        """Load completed batch IDs from the log and the loaded state."""
+        translation = self._ph_trans
+        completed = set()
+        if os.path.exists(self.completed_batches_log):
+            with open(self.completed_batches_log, 'rb') as f:
+                data = f.read()
+            # A last line without a newline is from an interrupted write;
+            # drop it so the next ID is not appended to it
+            end = data.rfind(b"\n") + 1
+            if end < len(data):
+                logger.warning(f"Discarding incomplete last line of {self.completed_batches_log}")
+                with open(self.completed_batches_log, 'r+b') as f:
+                    f.truncate(end)
+                    f.flush()
+                    os.fsync(f.fileno())
+            completed.update(data[:end].decode('utf-8').splitlines())
+        
+        # Checkpoints written before the log existed keep the IDs in the
+        # state; move them to the log before they are dropped from it
+        legacy = [batch_id for batch_id in translation.get("completed_batches", [])
+                  if batch_id not in completed]
+        if legacy:
+            with open(self.completed_batches_log, 'a', encoding='utf-8') as f:
+                f.write("".join(f"{batch_id}\n" for batch_id in legacy))
+                f.flush()
+                os.fsync(f.fileno())
+            completed.update(legacy)
+        translation.pop("completed_batches", None)
+        
+        self.completed_batches = completed
+        translation["batches_completed"] = len(completed)
+    
     def load_batch_status(self, batch_id):
         """Load status information for a batch.
         
@@ -463,13 +856,28 @@ class CheckpointManager:
             Dictionary with batch status information or None if not found
         """
         try:
-            status_file = f"{self.checkpoint_dir}/batches/batch_{batch_id}_status.json"
+            with self._batch_lock:
+                if self._batch_index is None:
+                    self._batch_index = self._build_batch_index()
+                location = self._batch_index.get(batch_id)
             
-            if not os.path.exists(status_file):
-                return None
-                
-            with open(status_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            if location is not None:
+                offset, length = location
+                with open(self.batch_status_log, 'rb') as f:
+                    f.seek(offset)
+                    return pickle.loads(f.read(length))
+            
+            # Batch status saved as a separate file by earlier versions
+            status_file = self._ckpt_batches_dir + "/batch_" + str(batch_id) + "_status"
+            
+            if os.path.exists(f"{status_file}.pkl"):
+                with open(f"{status_file}.pkl", 'rb') as f:
+                    return pickle.load(f)
+            
+            if os.path.exists(f"{status_file}.json"):
+                return _read_json(f"{status_file}.json")
+            
+            return None
         except Exception as e:
             logger.error(f"Error loading batch status for {batch_id}: {e}")
             return None
@@ -482,11 +890,11 @@ class CheckpointManager:
             batch_info: Dictionary with batch information
         """
         safe_id = item_id.replace('/', '_')
-        batch_file = f"{self.checkpoint_dir}/batches/item_{safe_id}_batches.json"
+        batch_file = self._ckpt_batches_dir + "/item_" + safe_id + "_batches.json"
         
         try:
-            with open(batch_file, 'w', encoding='utf-8') as f:
-                json.dump(batch_info, f, indent=2, ensure_ascii=False)
+            self._ensure_dir(self._ckpt_batches_dir)
+            _write_json(batch_file, batch_info)
             
             logger.debug(f"Batch info saved for item {item_id}")
             return True
@@ -504,14 +912,13 @@ class CheckpointManager:
             Dictionary with batch information or None if not found
         """
         safe_id = item_id.replace('/', '_')
-        batch_file = f"{self.checkpoint_dir}/batches/item_{safe_id}_batches.json"
+        batch_file = self._ckpt_batches_dir + "/item_" + safe_id + "_batches.json"
         
         if not os.path.exists(batch_file):
             return None
         
         try:
-            with open(batch_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return _read_json(batch_file)
         except Exception as e:
             logger.error(f"Error loading batch info for item {item_id}: {e}")
             return None
@@ -519,17 +926,28 @@ class CheckpointManager:
     def clear_checkpoint(self):
         """Clear checkpoint information."""
         try:
+            with self._batch_lock:
+                self._close_batch_logs()
             if os.path.exists(self.checkpoint_dir):
                 shutil.rmtree(self.checkpoint_dir)
             
+            # Forget the removed directories so they are created again
+            prefix = self.checkpoint_dir + "/"
+            self._ensured_dirs.difference_update(
+                [d for d in self._ensured_dirs if d == self.checkpoint_dir or d.startswith(prefix)]
+            )
+            
             # Recreate empty directories
             self._ensure_directories()
             
             # Reset state
-            self.state["last_updated"] = datetime.now().isoformat()
+            with self._batch_lock:
+                self.completed_batches = set()
+                self._batch_index = None
+            self.state["last_updated"] = _now_iso()
             self.state["total_progress"] = 0.0
-            for phase in self.state["phases"]:
-                self.state["phases"][phase]["completed"] = False
+            for phase in self._phases.values():
+                phase["completed"] = False
             
             logger.info("Checkpoint cleared")
             return True
@@ -543,10 +961,10 @@ class CheckpointManager:
         Returns:
             Dictionary with progress information
         """
-        phases = self.state["phases"]
+        phases = self._phases
         
         # Calculate expected time remaining
-        translation_phase = phases["translation"]
+        translation_phase = self._ph_trans
         
         progress_info = {
             "total_progress": self.state["total_progress"],
@@ -587,86 +1005,31 @@ class CheckpointManager:
         Returns:
             List of TOC items with their hierarchy
         """
-        def process_toc_entries(entries, depth=0):
+        try:
             result = []
-            for entry in entries:
-                # Handle different TOC entry types with more robust type checking
-                if isinstance(entry, tuple) and len(entry) >= 2:
-                    # tuple: (title, href) or (title, href, children)
-                    title, href = entry[0], entry[1]
-                    children = entry[2] if len(entry) > 2 else []
-                    
-                    item = {
-                        "title": str(title),
-                        "href": str(href),
-                        "depth": depth
-                    }
-                    result.append(item)
-                    
-                    # Process children
-                    if children:
-                        result.extend(process_toc_entries(children, depth + 1))
-                        
-                elif hasattr(entry, 'title') and hasattr(entry, 'href'):
-                    # ebooklib TOC entry object
-                    item = {
-                        "title": str(entry.title),
-                        "href": str(entry.href),
-                        "depth": depth
-                    }
-                    result.append(item)
-                    
-                    # Process children
-                    if hasattr(entry, 'children') and entry.children:
-                        result.extend(process_toc_entries(entry.children, depth + 1))
-                        
-                elif hasattr(entry, '__dict__'):
-                    # Generic object with attributes - handle Section or other custom types
-                    try:
-                        # Extract whatever properties we can
-                        props = {}
-                        if hasattr(entry, 'title'):
-                            props["title"] = str(entry.title)
-                        elif hasattr(entry, 'name'):
-                            props["title"] = str(entry.name)
-                        else:
-                            props["title"] = str(entry)
-                            
-                        if hasattr(entry, 'href'):
-                            props["href"] = str(entry.href)
-                        elif hasattr(entry, 'file_name'):
-                            props["href"] = str(entry.file_name)
-                        else:
-                            props["href"] = "#"
-                            
-                        props["depth"] = depth
-                        result.append(props)
-                        
-                        # Process any children
-                        if hasattr(entry, 'children') and entry.children:
-                            result.extend(process_toc_entries(entry.children, depth + 1))
-                        elif hasattr(entry, 'subitems') and entry.subitems:
-                            result.extend(process_toc_entries(entry.subitems, depth + 1))
-                    except Exception as e:
-                        # If we can't extract properties, just add a simple entry
-                        logger.warning(f"Could not fully process TOC entry: {str(e)}")
-                        result.append({
-                            "title": f"Entry {len(result) + 1}",
-                            "href": "#",
-                            "depth": depth
-                        })
-                else:
-                    # Fallback for any other type
-                    result.append({
-                        "title": str(entry),
-                        "href": "#",
-                        "depth": depth
-                    })
+            # Depth-first walk with an explicit stack, children pushed in reverse
+            # so entries come out in document order
+            stack = [(entry, 0) for entry in reversed(book.toc)]
+            while stack:
+                entry, depth = stack.pop()
+                handler = _TOC_HANDLERS.get(type(entry), _toc_object_fields)
+                try:
+                    title, href, children = handler(entry)
+                except Exception as e:
+                    # If we can't extract properties, just add a simple entry
+                    logger.warning(f"Could not fully process TOC entry: {str(e)}")
+                    title, href, children = f"Entry {len(result) + 1}", "#", None
+                
+                result.append({
+                    "title": title,
+                    "href": href,
+                    "depth": depth
+                })
+                
+                if children:
+                    stack.extend((child, depth + 1) for child in reversed(children))
             
             return result
-        
-        try:
-            return process_toc_entries(book.toc)
         except Exception as e:
             logger.error(f"Error extracting TOC: {str(e)}")
             # Return empty TOC in case of error
@@ -682,11 +1045,16 @@ class CheckpointManager:
             String containing the TOC text
         """
         toc_items = self._extract_toc(book)
-        toc_text = ""
+        parts = []
+        indents = {}
         
         for item in toc_items:
             depth = item.get("depth", 0)
-            title = item.get("title", "")
-            toc_text += "  " * depth + title + "\n"
+            indent = indents.get(depth)
+            if indent is None:
+                indent = indents[depth] = "  " * depth
+            parts.append(indent)
+            parts.append(item.get("title", ""))
+            parts.append("\n")
             
-        return toc_text
+        return "".join(parts)
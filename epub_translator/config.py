@@ -7,11 +7,74 @@ Handles loading, saving, and accessing configuration parameters.
 """
 
 import os
-import configparser
+import re
 import logging
 
 logger = logging.getLogger("epub_translator.config")
 
+# INI syntax: section headers, "key = value" / "key: value" options, comments
+_SECTION_RE = re.compile(r'^\[([^\]]+)\]\s*$')
+_OPTION_RE = re.compile(r'^([^=:\s][^=:]*?)\s*[=:]\s*(.*?)\s*$')
+_COMMENT_PREFIXES = ('#', ';')
+
+# Accepted spellings of boolean values, as in configparser
+_BOOLEAN_STATES = {
+    '1': True, 'yes': True, 'true': True, 'on': True,
+    '0': False, 'no': False, 'false': False, 'off': False
+}
+
+def _parse_ini(text):
+    """Parse INI text into a nested dictionary.
+    
+    Option names are lower-cased and indented lines continue the previous
+    value, like configparser; values are not interpolated.
+    
+    Args:
+        text: INI file content
+    
+    Returns:
+        Dictionary mapping section names to {option: value} dictionaries
+    """
+    sections = {}
+    options = None
+    option = None
+    for line in text.splitlines():
+        stripped = line.strip()
+        if not stripped or stripped.startswith(_COMMENT_PREFIXES):
+            option = None if not stripped else option
+            continue
+        
+        # Continuation of a multi-line value
+        if line[0].isspace() and option is not None:
+            options[option] += "\n" + stripped
+            continue
+        
+        match = _SECTION_RE.match(stripped)
+        if match:
+            options = sections.setdefault(match.group(1), {})
+            option = None
+            continue
+        
+        match = _OPTION_RE.match(stripped)
+        if match and options is not None:
+            option = match.group(1).lower()
+            options[option] = match.group(2)
+        else:
+            logger.warning(f"Ignoring invalid configuration line: {stripped}")
+            option = None
+    return sections
+
+def _parse_boolean(value):
+    """Convert a configuration string to a boolean.
+    
+    Raises:
+        ValueError: If the string is not a recognized boolean
+    """
+    try:
+        return _BOOLEAN_STATES[value.lower()]
+    except KeyError:
+        raise ValueError(f"Not a boolean: {value}")
+
 class Config:
     """Configuration handler for the EPUB translator."""
     
@@ -37,114 +100,249 @@ class Config:
         },
         'processing': {
             'batch_size': '10',  # paragraphs per API request
+            'max_batch_chars': '4000',  # characters per batch, 0 = no limit
+            'texts_per_request': '0',  # cap on paragraphs joined into one request, 0 = whole batch
             'max_parallel_requests': '3',
             'cache_translations': 'True',
-            'cache_dir': '.translation_cache'
+            'translation_cache_size': '50000',  # translations kept in memory
+            'cache_dir': '.translation_cache',
+            'cache_db': '',  # translation store path, default: <cache_dir>/translations.db
+            'background_content_writes': 'True',  # write inspection files off the translation threads
+            'content_writer_threads': '4',
+            'save_debug_hashes': 'True'  # segment hashes in batch_info.json
         }
     }
     
     def __init__(self, config_file="config.ini"):
         """Initialize configuration from file or create default."""
         self.config_file = config_file
-        self.config = configparser.ConfigParser()
+        self.config = {}  # {section: {option: value}}
+        self.revision = 0  # Bumped on every set() so callers can detect changes
+        self._dirty = False  # Whether there are changes save() has not written
         
         # Load existing config or create default
         if os.path.exists(config_file):
             logger.info(f"Loading configuration from {config_file}")
-            self.config.read(config_file)
+            with open(config_file, 'r', encoding='utf-8') as f:
+                self.config = _parse_ini(f.read())
             self._validate_config()
         else:
             logger.info(f"Creating default configuration in {config_file}")
             self._create_default_config()
             self.save()
+        
+        self._build_lookup()
+    
+    def _build_lookup(self):
+        """Index all options by (section, option) for single-lookup access.
+        
+        Converted values are memoized per type on first use.
+        """
+        self._flat = {
+            (section, option): value
+            for section, options in self.config.items()
+            for option, value in options.items()
+        }
+        self._converted = {}  # {(kind, section, option): converted value}
     
     def _create_default_config(self):
         """Create default configuration."""
         for section, options in self.DEFAULT_CONFIG.items():
-            if not self.config.has_section(section):
-                self.config.add_section(section)
-            
-            for option, value in options.items():
-                self.config.set(section, option, value)
+            self.config.setdefault(section, {}).update(options)
+        self._dirty = True
     
     def _validate_config(self):
         """Ensure all required configuration options are present."""
         # Add any missing sections or options
         for section, options in self.DEFAULT_CONFIG.items():
-            if not self.config.has_section(section):
+            if section not in self.config:
                 logger.warning(f"Missing section '{section}' in config, adding defaults")
-                self.config.add_section(section)
+            section_options = self.config.setdefault(section, {})
             
             for option, default_value in options.items():
-                if not self.config.has_option(section, option):
-                    logger.warning(f"Missing option '{option}' in section '{section}', adding default")
-                    self.config.set(section, option, default_value)
+                if option not in section_options:
+                    # Every option has a default, so a missing one is routine
+                    # for config files written by older versions
+                    logger.debug(f"Missing option '{option}' in section '{section}', adding default")
+                    section_options[option] = default_value
+                    self._dirty = True
+    
+    def _lookup(self, section, option):
+        """Get the raw string value of an option, or None if it is not set."""
+        value = self._flat.get((section, option))
+        if value is None and not option.islower():
+            value = self._flat.get((section, option.lower()))
+        return value
+    
+    def _get_converted(self, section, option, fallback, convert, kind):
+        """Get an option converted to a type, with fallback and defaults.
+        
+        Args:
+            section: Configuration section
+            option: Option name
+            fallback: Value returned when the option is missing or invalid
+            convert: Function converting the string value
+            kind: Type name used in the error message
+        
+        Returns:
+            Converted value, fallback, converted default or None
+        """
+        key = (kind, section, option)
+        converted = self._converted.get(key)
+        if converted is not None:
+            return converted
+        
+        value = self._lookup(section, option)
+        if value is not None:
+            try:
+                converted = self._converted[key] = convert(value)
+                return converted
+            except ValueError:
+                pass
+        if fallback is not None:
+            return fallback
+        # If no fallback is provided, check if there's a default
+        try:
+            return convert(self.DEFAULT_CONFIG[section][option])
+        except (KeyError, ValueError):
+            logger.error(f"{kind} configuration option '{section}.{option}' not found or invalid")
+            return None
     
     def get(self, section, option, fallback=None):
         """Get configuration value."""
+        value = self._lookup(section, option)
+        if value is not None:
+            return value
+        if fallback is not None:
+            return fallback
+        # If no fallback is provided, check if there's a default
         try:
-            return self.config.get(section, option)
-        except (configparser.NoSectionError, configparser.NoOptionError):
-            if fallback is not None:
-                return fallback
-            # If no fallback is provided, check if there's a default
-            try:
-                return self.DEFAULT_CONFIG[section][option]
-            except KeyError:
-                logger.error(f"Configuration option '{section}.{option}' not found")
-                return None
+            return self.DEFAULT_CONFIG[section][option]
+        except KeyError:
+            logger.error(f"Configuration option '{section}.{option}' not found")
+            return None
     
     def getboolean(self, section, option, fallback=None):
         """Get boolean configuration value."""
-        try:
-            return self.config.getboolean(section, option)
-        except (configparser.NoSectionError, configparser.NoOptionError, ValueError):
-            if fallback is not None:
-                return fallback
-            # If no fallback is provided, check if there's a default
-            try:
-                return self.config.getboolean(section, self.DEFAULT_CONFIG[section][option])
-            except (KeyError, ValueError):
-                logger.error(f"Boolean configuration option '{section}.{option}' not found or invalid")
-                return None
+        return self._get_converted(section, option, fallback, _parse_boolean, "Boolean")
     
     def getint(self, section, option, fallback=None):
         """Get integer configuration value."""
-        try:
-            return self.config.getint(section, option)
-        except (configparser.NoSectionError, configparser.NoOptionError, ValueError):
-            if fallback is not None:
-                return fallback
-            # If no fallback is provided, check if there's a default
-            try:
-                return int(self.DEFAULT_CONFIG[section][option])
-            except (KeyError, ValueError):
-                logger.error(f"Integer configuration option '{section}.{option}' not found or invalid")
-                return None
+        return self._get_converted(section, option, fallback, int, "Integer")
     
     def getfloat(self, section, option, fallback=None):
         """Get float configuration value."""
-        try:
-            return self.config.getfloat(section, option)
-        except (configparser.NoSectionError, configparser.NoOptionError, ValueError):
-            if fallback is not None:
-                return fallback
-            # If no fallback is provided, check if there's a default
-            try:
-                return float(self.DEFAULT_CONFIG[section][option])
-            except (KeyError, ValueError):
-                logger.error(f"Float configuration option '{section}.{option}' not found or invalid")
-                return None
+        return self._get_converted(section, option, fallback, float, "Float")
     
     def set(self, section, option, value):
         """Set configuration value."""
-        if not self.config.has_section(section):
-            self.config.add_section(section)
-        
-        self.config.set(section, option, str(value))
+        option = option.lower()
+        value = str(value)
+        self.config.setdefault(section, {})[option] = value
+        self._flat[(section, option)] = value
+        self._converted.clear()
+        self.revision += 1
+        self._dirty = True
     
     def save(self):
-        """Save configuration to file."""
-        with open(self.config_file, 'w') as f:
-            self.config.write(f)
+        """Save configuration to file.
+        
+        Nothing is written if the configuration is unchanged since it was
+        loaded or last saved. The file is replaced atomically, so a crash
+        never leaves a half-written config.
+        """
+        if not self._dirty:
+            return
+        
+        lines = []
+        for section, options in self.config.items():
+            lines.append(f"[{section}]")
+            for option, value in options.items():
+                lines.append(f"{option} = {value}".replace("\n", "\n\t"))
+            lines.append("")
+        data = ("\n".join(lines) + "\n").encode('utf-8')
+        
+        # Keep the permissions of an existing file, which holds the API key
+        try:
+            mode = os.stat(self.config_file).st_mode & 0o777
+        except FileNotFoundError:
+            mode = 0o666
+        
+        tmp_path = f"{self.config_file}.tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, mode)
+        try:
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view):]
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.replace(tmp_path, self.config_file)
+        
+        self._dirty = False
         logger.info(f"Configuration saved to {self.config_file}")
+
+
+class Settings:
+    """Typed, read-only snapshot of the options used to build the translator,
+    terminology extractor and processor.
+    
+    Options are read from a Config once by from_config(); afterwards they are
+    plain attribute lookups.
+    """
+    
+    # (attribute, section, option, type, fallback)
+    SCHEMA = (
+        ("api_key", "deepseek", "api_key", str, None),
+        ("model", "deepseek", "model", str, None),
+        ("max_retries", "deepseek", "max_retries", int, None),
+        ("timeout", "deepseek", "timeout", int, None),
+        ("rate_limit", "deepseek", "rate_limit", int, None),
+        ("texts_per_request", "processing", "texts_per_request", int, 0),
+        ("source_lang", "translation", "source_lang", str, "en"),
+        ("target_lang", "translation", "target_lang", str, "zh-CN"),
+        ("use_deepseek", "terminology", "use_deepseek", bool, True),
+        ("auto_extract_terms", "terminology", "enable_auto_extraction", bool, True),
+        ("batch_size", "processing", "batch_size", int, None),
+        ("max_batch_chars", "processing", "max_batch_chars", int, 4000),
+        ("max_workers", "processing", "max_parallel_requests", int, None),
+        ("chunk_size", "processing", "chunk_size", int, 5000),
+    )
+    
+    # Config getter for each option type
+    _GETTERS = {str: "get", int: "getint", bool: "getboolean", float: "getfloat"}
+    
+    __slots__ = tuple(field[0] for field in SCHEMA)
+    
+    def __init__(self, **values):
+        """Initialize settings from keyword arguments named after SCHEMA fields.
+        
+        Fields that are not given take their SCHEMA fallback.
+        """
+        for name, _section, _option, _type, fallback in self.SCHEMA:
+            object.__setattr__(self, name, values.pop(name, fallback))
+        if values:
+            raise TypeError(f"Unknown settings: {', '.join(sorted(values))}")
+    
+    def __setattr__(self, name, value):
+        raise AttributeError("Settings are read-only")
+    
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__
+                           if name != "api_key")
+        return f"Settings({fields})"
+    
+    @classmethod
+    def from_config(cls, config):
+        """Read all settings from a configuration in a single pass.
+        
+        Args:
+            config: Config instance
+        
+        Returns:
+            Settings instance
+        """
+        values = {}
+        for name, section, option, type_, fallback in cls.SCHEMA:
+            values[name] = getattr(config, cls._GETTERS[type_])(section, option, fallback=fallback)
+        return cls(**values)
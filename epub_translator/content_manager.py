@@ -8,38 +8,404 @@ Handles saving and managing intermediate content files for inspection and debugg
 
 import os
 import json
+import atexit
 import logging
+import re
 import hashlib
-from bs4 import BeautifulSoup
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from lxml import etree, html as lxml_html
 
 logger = logging.getLogger("epub_translator.content_manager")
 
+# orjson is optional; it serializes batch and metadata files much faster
+try:
+    import orjson
+    ORJSON_SUPPORT = True
+except ImportError:
+    ORJSON_SUPPORT = False
+
+# Content is re-encoded before parsing because lxml rejects str input that
+# carries an XML encoding declaration, which most EPUB XHTML files do
+_HTML_PARSER = lxml_html.HTMLParser(encoding='utf-8')
+
+# Runs of spaces that separate headlines run together on one line
+_MULTISPACE = re.compile(r'[ \t]{2,}')
+
+# Characters not allowed in file names, mapped to underscores
+_INVALID_FILENAME_CHARS = str.maketrans({char: '_' for char in '<>:"/\\|?*'})
+
+def _write_bytes(path, data):
+    """Write bytes to a file atomically through a raw file descriptor.
+    
+    The data goes to a uniquely named temporary file in the same directory,
+    which then replaces the target, so an interrupted write never leaves a
+    truncated file behind.
+    
+    Args:
+        path: Path to the file
+        data: Bytes to write
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".",
+                                    prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        try:
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view):]
+        finally:
+            os.close(fd)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+def _write_text(path, text):
+    """Write a string to a file as UTF-8, encoded in one go.
+    
+    Args:
+        path: Path to the file
+        text: Text to write
+    """
+    _write_bytes(path, text.encode('utf-8'))
+
+def _text_companion(path):
+    """Get the path of the plain-text copy saved next to an HTML file."""
+    return os.path.splitext(path)[0] + '.txt'
+
+def _write_html_and_text(path, contents):
+    """Write an HTML file and its plain-text copy.
+    
+    Args:
+        path: Path to the HTML file
+        contents: Tuple of (HTML content, text content)
+    """
+    html_content, text_content = contents
+    _write_text(path, html_content)
+    _write_text(_text_companion(path), text_content)
+
+def _content_digest(content):
+    """Hash item content to tell whether a saved copy is current.
+    
+    Args:
+        content: Raw item content bytes
+        
+    Returns:
+        Hex digest string
+    """
+    return hashlib.blake2b(content, digest_size=16).hexdigest()
+
+def _list_dir(path, dirs_only=False):
+    """List the entry names in a directory with a single scandir.
+    
+    Args:
+        path: Directory path
+        dirs_only: Whether to only list subdirectories
+        
+    Returns:
+        List of entry names, empty if the directory does not exist
+    """
+    try:
+        with os.scandir(path) as entries:
+            return [entry.name for entry in entries
+                    if not dirs_only or entry.is_dir()]
+    except (FileNotFoundError, NotADirectoryError):
+        return []
+
+def _write_json(path, data):
+    """Write data to an indented JSON file.
+    
+    Args:
+        path: Path to the JSON file
+        data: JSON-serializable data
+    """
+    if ORJSON_SUPPORT:
+        _write_bytes(path, orjson.dumps(data, option=orjson.OPT_INDENT_2))
+    else:
+        _write_text(path, json.dumps(data, indent=2, ensure_ascii=False))
+
 class ContentManager:
     """Manages intermediate content files for inspection."""
     
-    def __init__(self, workdir):
+    # Number of parsed HTML items kept for reuse between save calls
+    HTML_CACHE_SIZE = 32
+    
+    def __init__(self, workdir, config=None):
         """Initialize content manager.
         
         Args:
             workdir: Working directory for content files
+            config: Configuration object (optional). Files are written by
+                processing.content_writer_threads background threads when
+                processing.background_content_writes is enabled, which it
+                is by default.
         """
         self.workdir = workdir
+        self._ensured_dirs = set()  # Directories known to exist
+        
+        # Paths used by every save call, built once
+        self._html_items_dir = f"{workdir}/html_items"
+        self._metadata_dir = f"{workdir}/metadata"
+        self._chapters_original_dir = f"{workdir}/chapters_original"
+        self._chapters_translated_dir = f"{workdir}/chapters_translated"
+        self._batches_dir = f"{workdir}/batches"
+        self._terminology_dir = f"{workdir}/terminology"
+        self._item_dirs = {}  # item ID -> (safe ID, item directory)
+        
+        # Content files are only read back for inspection, so writing them
+        # need not hold up translation. Several writers overlap the latency
+        # of the many small files written per batch.
+        background = config is not None and config.getboolean(
+            'processing', 'background_content_writes', fallback=True)
+        if background:
+            threads = max(1, config.getint('processing', 'content_writer_threads', fallback=4))
+            self._writer = ThreadPoolExecutor(
+                max_workers=threads, thread_name_prefix="content-writer")
+        else:
+            self._writer = None
+        
+        # Queued writes by path, so writes to one file stay in order
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        
+        # Segment hashes in batch_info.json only help identify segments
+        # when debugging, so they can be switched off
+        self._save_hashes = config is None or config.getboolean(
+            'processing', 'save_debug_hashes', fallback=True)
+        
+        # Parsed items, keyed by (item ID, is_translated), least recent first;
+        # shared by the chapter translation threads
+        self._html_cache = OrderedDict()
+        self._html_cache_lock = threading.Lock()
+        
+        # Hashes of the item content behind saved HTML and chapter files,
+        # kept across runs so unchanged files are not written again
+        self._content_hashes_file = f"{workdir}/.content_hashes.json"
+        self._content_hashes = self._load_content_hashes()  # key -> [hash, path]
+        self._hashes_dirty = False
+        self._hashes_lock = threading.Lock()
+        # Serializes writes of the hashes file, so an older copy never
+        # replaces a newer one
+        self._hashes_write_lock = threading.Lock()
+        atexit.register(self.flush)
         
         # Create directories
         self._ensure_directories()
     
+    def _submit(self, write, path, data, saved=None):
+        """Write a file, in the background if a writer thread is running.
+        
+        Args:
+            write: Module write function (_write_text, _write_json or
+                _write_html_and_text)
+            path: Path to the file
+            data: Content passed to the write function
+            saved: Tuple of (content hash entry key, content digest) recorded
+                for the file once it is written (optional)
+        """
+        if self._writer is None:
+            try:
+                write(path, data)
+            except Exception:
+                if saved is not None:
+                    self._forget_saved(saved[0])
+                raise
+            if saved is not None:
+                self._record_saved(saved[0], saved[1], path)
+            return
+        
+        # A file written again (metadata, the index) must not be overwritten
+        # by an older write still queued on another thread, so each write
+        # waits for the previous one to the same path. Both are looked up
+        # and registered under one lock, so concurrent callers are chained
+        # in the order they register.
+        with self._pending_lock:
+            previous = self._pending.get(path)
+            future = self._writer.submit(
+                self._background_write, previous, write, path, data, saved)
+            self._pending[path] = future
+        future.add_done_callback(lambda done: self._forget_write(path, done))
+    
+    def _forget_write(self, path, future):
+        """Drop a finished write from the queued writes."""
+        with self._pending_lock:
+            if self._pending.get(path) is future:
+                del self._pending[path]
+    
+    def _background_write(self, previous, write, path, data, saved):
+        """Run a write on the writer thread, logging failures.
+        
+        The previous write to the same path, if any, was submitted earlier
+        and so has already been taken up by a writer thread; it is waited
+        for first.
+        """
+        if previous is not None:
+            wait([previous])
+        try:
+            write(path, data)
+        except Exception as e:
+            logger.error(f"Error writing content file {path}: {e}")
+            if saved is not None:
+                # Write the file again next time
+                self._forget_saved(saved[0])
+            return
+        if saved is not None:
+            self._record_saved(saved[0], saved[1], path)
+    
+    def flush(self):
+        """Wait until all queued content files are written and save the
+        content hashes.
+        
+        Only files whose write has finished have a hash recorded, so the
+        saved hashes never cover a file still being written.
+        """
+        if self._writer is not None:
+            with self._pending_lock:
+                futures = list(self._pending.values())
+            wait(futures)
+        
+        with self._hashes_write_lock:
+            with self._hashes_lock:
+                if not self._hashes_dirty:
+                    return
+                self._hashes_dirty = False
+                content_hashes = dict(self._content_hashes)
+            try:
+                _write_json(self._content_hashes_file, content_hashes)
+            except Exception as e:
+                logger.error(f"Error saving content hashes: {e}")
+                with self._hashes_lock:
+                    self._hashes_dirty = True
+    
+    def _load_content_hashes(self):
+        """Load the content hashes saved by a previous run.
+        
+        Returns:
+            Dictionary of hash entries, empty if none were saved
+        """
+        try:
+            with open(self._content_hashes_file, 'rb') as f:
+                data = f.read()
+            return orjson.loads(data) if ORJSON_SUPPORT else json.loads(data)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable content hashes: {e}")
+            return {}
+    
+    def _saved_path(self, key, digest):
+        """Get the HTML file saved for content with a hash, if it and its
+        text copy still exist.
+        
+        Args:
+            key: Content hash entry key
+            digest: Hash of the item content
+            
+        Returns:
+            Path to the saved file, or None if it must be written
+        """
+        with self._hashes_lock:
+            entry = self._content_hashes.get(key)
+        if (entry is not None and entry[0] == digest and os.path.exists(entry[1])
+                and os.path.exists(_text_companion(entry[1]))):
+            return entry[1]
+        return None
+    
+    def _record_saved(self, key, digest, path):
+        """Record the hash of the content written to a file.
+        
+        Args:
+            key: Content hash entry key
+            digest: Hash of the item content
+            path: Path to the saved file
+        """
+        with self._hashes_lock:
+            self._content_hashes[key] = [digest, path]
+            self._hashes_dirty = True
+    
+    def _forget_saved(self, key):
+        """Drop the content hash of a file whose write failed.
+        
+        Args:
+            key: Content hash entry key
+        """
+        with self._hashes_lock:
+            if self._content_hashes.pop(key, None) is not None:
+                self._hashes_dirty = True
+    
+    def close(self):
+        """Write all queued content files, save the content hashes and stop
+        the writer threads.
+        
+        Files saved afterwards are written synchronously.
+        """
+        self.flush()
+        if self._writer is not None:
+            self._writer.shutdown(wait=True)
+            self._writer = None
+        # The exit hook is no longer needed and would keep this manager alive
+        atexit.unregister(self.flush)
+    
+    def _item_paths(self, item_id):
+        """Get the file-name-safe ID and directory of an HTML item.
+        
+        Args:
+            item_id: HTML item ID
+            
+        Returns:
+            Tuple of (safe ID, item directory path)
+        """
+        paths = self._item_dirs.get(item_id)
+        if paths is None:
+            safe_id = item_id.replace('/', '_')
+            paths = self._item_dirs[item_id] = (safe_id, f"{self._html_items_dir}/{safe_id}")
+        return paths
+    
+    # Top-level directories created in the working directory
+    DIRECTORIES = (
+        "html_items",
+        "metadata",
+        "chapters_original",
+        "chapters_translated",
+        "batches",
+    )
+    
     def _ensure_directories(self):
-        """Create necessary directories for content files."""
-        directories = [
-            f"{self.workdir}/html_items",
-            f"{self.workdir}/metadata",
-            f"{self.workdir}/chapters_original",
-            f"{self.workdir}/chapters_translated",
-            f"{self.workdir}/batches"
-        ]
-        
-        for directory in directories:
-            os.makedirs(directory, exist_ok=True)
+        """Create necessary directories for content files.
+        
+        The working directory is listed once and only missing directories
+        are created, so a rerun on an existing working directory costs a
+        single scandir.
+        """
+        if os.path.isdir(self.workdir):
+            with os.scandir(self.workdir) as entries:
+                existing = {entry.name for entry in entries}
+        else:
+            existing = set()
+        
+        for name in self.DIRECTORIES:
+            directory = f"{self.workdir}/{name}"
+            if name not in existing:
+                os.makedirs(directory, exist_ok=True)
+            # The save methods need not create these directories again
+            self._ensured_dirs.add(directory)
+    
+    def _ensure_dir(self, directory):
+        """Create a directory unless it was already created by this manager.
+        
+        Args:
+            directory: Path to the directory
+        """
+        if directory in self._ensured_dirs:
+            return
+        os.makedirs(directory, exist_ok=True)
+        self._ensured_dirs.add(directory)
     
     def save_html_item(self, item, is_translated=False):
         """Save HTML item content.
@@ -52,31 +418,27 @@ class ContentManager:
             Path to saved HTML file
         """
         item_id = item.get_id()
-        safe_id = item_id.replace('/', '_')
         
-        # Create directory for this item
-        item_dir = f"{self.workdir}/html_items/{safe_id}"
-        os.makedirs(item_dir, exist_ok=True)
+        # Create directory for this item and its batches (the item directory
+        # is created along with its batches directory)
+        _, item_dir = self._item_paths(item_id)
+        self._ensure_dir(f"{item_dir}/batches")
         
-        # Create directory for batches
-        os.makedirs(f"{item_dir}/batches", exist_ok=True)
-        
-        # Get content
-        content = item.get_content().decode('utf-8')
-        
-        # Save HTML file
         file_name = "translated.html" if is_translated else "original.html"
         file_path = f"{item_dir}/{file_name}"
         
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(content)
+        # Nothing to do if the same content was saved before
+        digest = _content_digest(item.get_content())
+        if self._saved_path(file_path, digest):
+            logger.debug(f"HTML item {item_id} is unchanged, not saving it again")
+            return item_dir
         
-        # Also save as text for easier inspection
-        text_content = self._extract_text_from_html(content)
-        text_file_path = f"{item_dir}/{file_name.replace('.html', '.txt')}"
+        content, text_content, _ = self._parse_item(item, is_translated)
         
-        with open(text_file_path, 'w', encoding='utf-8') as f:
-            f.write(text_content)
+        # Save HTML file, and as text for easier inspection; the hash is
+        # recorded once both are written
+        self._submit(_write_html_and_text, file_path, (content, text_content),
+                     (file_path, digest))
         
         logger.debug(f"Saved HTML item {item_id} to {file_path}")
         return item_dir
@@ -94,51 +456,78 @@ class ContentManager:
         Returns:
             Path to batch directory
         """
-        safe_id = item_id.replace('/', '_')
-        batch_dir = f"{self.workdir}/html_items/{safe_id}/batches/batch_{batch_id:03d}"
-        os.makedirs(batch_dir, exist_ok=True)
+        return self.save_batch_soa(
+            item_id,
+            batch_id,
+            [type(segment[0]).__name__ if segment[0] else None for segment in segments],
+            [segment[1] for segment in segments],
+            [segment[2] for segment in segments],
+            translated_texts,
+            protected_texts
+        )
+    
+    def save_batch_soa(self, item_id, batch_id, element_types, attributes, texts,
+                       translated_texts=None, protected_texts=None):
+        """Save batch content given as parallel lists rather than segment tuples.
         
-        # Extract original texts
-        original_texts = [segment[2] for segment in segments]
+        Args:
+            item_id: HTML item ID
+            batch_id: Batch ID
+            element_types: List of segment element type names (None if no element)
+            attributes: List of segment attributes
+            texts: List of original segment texts
+            translated_texts: List of translated texts (optional)
+            protected_texts: List of texts with protected terminology (optional)
+            
+        Returns:
+            Path to batch directory
+        """
+        _, item_dir = self._item_paths(item_id)
+        batch_dir = f"{item_dir}/batches/batch_{batch_id:03d}"
+        self._ensure_dir(batch_dir)
         
         # Save original texts
-        with open(f"{batch_dir}/original.txt", 'w', encoding='utf-8') as f:
-            f.write('\n---\n'.join(original_texts))
+        self._submit(_write_text, f"{batch_dir}/original.txt", '\n---\n'.join(texts))
         
         # Save protected texts if provided
         if protected_texts:
-            with open(f"{batch_dir}/protected.txt", 'w', encoding='utf-8') as f:
-                f.write('\n---\n'.join(protected_texts))
+            self._submit(_write_text, f"{batch_dir}/protected.txt", '\n---\n'.join(protected_texts))
         
         # Save translated texts if provided
         if translated_texts:
-            with open(f"{batch_dir}/translated.txt", 'w', encoding='utf-8') as f:
-                f.write('\n---\n'.join(translated_texts))
+            self._submit(_write_text, f"{batch_dir}/translated.txt", '\n---\n'.join(translated_texts))
             
             # Also save parallel text for comparison
-            with open(f"{batch_dir}/parallel.txt", 'w', encoding='utf-8') as f:
-                for i, (orig, trans) in enumerate(zip(original_texts, translated_texts)):
-                    f.write(f"=== Segment {i+1} ===\n")
-                    f.write(f"原文: {orig}\n")
-                    f.write(f"译文: {trans}\n\n")
+            self._submit(_write_text, f"{batch_dir}/parallel.txt", ''.join(
+                f"=== Segment {i+1} ===\n原文: {orig}\n译文: {trans}\n\n"
+                for i, (orig, trans) in enumerate(zip(texts, translated_texts))
+            ))
         
         # Save batch details as JSON for more technical inspection
+        if self._save_hashes:
+            text_hashes = [
+                hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+                for text in texts
+            ]
+        else:
+            text_hashes = [None] * len(texts)
+        
         batch_info = {
             "batch_id": batch_id,
-            "segments_count": len(segments),
+            "segments_count": len(texts),
             "segments": [
                 {
                     "index": i,
-                    "element_type": type(segment[0]).__name__ if segment[0] else None,
-                    "attribute": segment[1],
-                    "text_length": len(segment[2]),
-                    "text_hash": hashlib.md5(segment[2].encode()).hexdigest()
-                } for i, segment in enumerate(segments)
+                    "element_type": element_type,
+                    "attribute": attribute,
+                    "text_length": text_length,
+                    "text_hash": text_hash
+                } for i, (element_type, attribute, text_length, text_hash) in enumerate(
+                    zip(element_types, attributes, map(len, texts), text_hashes))
             ]
         }
         
-        with open(f"{batch_dir}/batch_info.json", 'w', encoding='utf-8') as f:
-            json.dump(batch_info, f, indent=2, ensure_ascii=False)
+        self._submit(_write_json, f"{batch_dir}/batch_info.json", batch_info)
         
         logger.debug(f"Saved batch {batch_id} for item {item_id} to {batch_dir}")
         return batch_dir
@@ -153,10 +542,10 @@ class ContentManager:
         Returns:
             Path to terminology file
         """
-        file_path = f"{self.workdir}/terminology/{filename}"
+        file_path = f"{self._terminology_dir}/{filename}"
         
         # Create the terms directory if it doesn't exist
-        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        self._ensure_dir(os.path.dirname(file_path))
         
         try:
             import csv
@@ -185,41 +574,36 @@ class ContentManager:
             Path to saved chapter file
         """
         item_id = item.get_id()
-        safe_id = item_id.replace('/', '_')
+        safe_id, _ = self._item_paths(item_id)
+        
+        # Determine directory based on translation state
+        target_dir = self._chapters_translated_dir if is_translated else self._chapters_original_dir
+        
+        # Nothing to do if the same content was saved before under the same
+        # title. Without a given title, the title comes from the content.
+        hash_key = f"{'translated' if is_translated else 'original'}:{item_id}"
+        digest = _content_digest(item.get_content())
+        saved_path = self._saved_path(hash_key, digest)
+        if saved_path and (not chapter_title or saved_path ==
+                           f"{target_dir}/{safe_id}_{self._sanitize_filename(chapter_title)}.html"):
+            logger.debug(f"Chapter {item_id} is unchanged, not saving it again")
+            return saved_path
         
-        # Get content
-        content = item.get_content().decode('utf-8')
+        content, text_content, title = self._parse_item(item, is_translated)
         
-        # Extract title if not provided
+        # Use the item's first heading or title if no title is provided
         if not chapter_title:
-            try:
-                soup = BeautifulSoup(content, 'html.parser')
-                title_tag = soup.find(['h1', 'h2', 'h3', 'h4', 'title'])
-                if title_tag:
-                    chapter_title = title_tag.get_text().strip()
-                else:
-                    chapter_title = f"Chapter {safe_id}"
-            except Exception as e:
-                logger.error(f"Error extracting chapter title: {e}")
-                chapter_title = f"Chapter {safe_id}"
+            chapter_title = title or f"Chapter {safe_id}"
         
         # Create sanitized filename from title
         filename = f"{safe_id}_{self._sanitize_filename(chapter_title)}.html"
         
-        # Determine directory based on translation state
-        target_dir = f"{self.workdir}/chapters_translated" if is_translated else f"{self.workdir}/chapters_original"
-        os.makedirs(target_dir, exist_ok=True)
+        self._ensure_dir(target_dir)
         
-        # Save HTML file
+        # Save HTML file, and as text for easier reading
         file_path = f"{target_dir}/{filename}"
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(content)
-        
-        # Also save as text for easier reading
-        text_content = self._extract_text_from_html(content)
-        text_file_path = f"{target_dir}/{filename.replace('.html', '.txt')}"
-        with open(text_file_path, 'w', encoding='utf-8') as f:
-            f.write(text_content)
+        self._submit(_write_html_and_text, file_path, (content, text_content),
+                     (hash_key, digest))
         
         logger.debug(f"Saved chapter {chapter_title} to {file_path}")
         return file_path
@@ -236,33 +620,32 @@ class ContentManager:
         Returns:
             Path to batch file
         """
-        safe_id = item_id.replace('/', '_')
-        batches_dir = f"{self.workdir}/batches"
-        os.makedirs(batches_dir, exist_ok=True)
+        safe_id, _ = self._item_paths(item_id)
+        batches_dir = self._batches_dir
+        self._ensure_dir(batches_dir)
         
         # Create batch filename
         filename = f"{safe_id}_batch_{batch_id:03d}.txt"
         file_path = f"{batches_dir}/{filename}"
         
         # Create content with parallel text
-        content = f"Chapter ID: {item_id}\nBatch: {batch_id}\n"
-        content += "=" * 50 + "\n\n"
+        parts = [f"Chapter ID: {item_id}\nBatch: {batch_id}\n", "=" * 50 + "\n\n"]
         
         if translated_texts:
             # Save parallel text
-            for i, (orig, trans) in enumerate(zip(original_texts, translated_texts)):
-                content += f"=== Segment {i+1} ===\n"
-                content += f"Original: {orig}\n"
-                content += f"Translated: {trans}\n\n"
+            parts.extend(
+                f"=== Segment {i+1} ===\nOriginal: {orig}\nTranslated: {trans}\n\n"
+                for i, (orig, trans) in enumerate(zip(original_texts, translated_texts))
+            )
         else:
             # Save just original texts
-            for i, text in enumerate(original_texts):
-                content += f"=== Segment {i+1} ===\n"
-                content += f"{text}\n\n"
+            parts.extend(
+                f"=== Segment {i+1} ===\n{text}\n\n"
+                for i, text in enumerate(original_texts)
+            )
                 
-        # Write to file
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(content)
+        # Write to file in one piece
+        self._submit(_write_text, file_path, ''.join(parts))
             
         logger.debug(f"Saved standalone batch file for {item_id}, batch {batch_id} to {file_path}")
         return file_path
@@ -277,9 +660,7 @@ class ContentManager:
             Sanitized filename
         """
         # Replace invalid characters
-        invalid_chars = '<>:"/\\|?*'
-        for char in invalid_chars:
-            filename = filename.replace(char, '_')
+        filename = filename.translate(_INVALID_FILENAME_CHARS)
             
         # Limit length
         if len(filename) > 50:
@@ -298,22 +679,17 @@ class ContentManager:
             Path to metadata file
         """
         file_name = "metadata_translated.json" if is_translated else "metadata_original.json"
-        file_path = f"{self.workdir}/metadata/{file_name}"
-        
-        # Convert metadata to serializable format
-        serializable_metadata = {}
-        for key, value in metadata.items():
-            if isinstance(value, list):
-                # Handle lists of tuples or complex objects
-                serializable_metadata[key] = [
-                    item[0] if isinstance(item, tuple) and len(item) > 0 else str(item)
-                    for item in value
-                ]
-            else:
-                serializable_metadata[key] = str(value)
-        
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(serializable_metadata, f, indent=2, ensure_ascii=False)
+        file_path = f"{self._metadata_dir}/{file_name}"
+        
+        # Convert metadata to serializable format: Dublin Core fields are
+        # lists of (value, attributes) tuples, of which the value is kept
+        serializable_metadata = {
+            key: [item[0] if type(item) is tuple and item else str(item) for item in value]
+            if type(value) is list else str(value)
+            for key, value in metadata.items()
+        }
+        
+        self._submit(_write_json, file_path, serializable_metadata)
         
         logger.debug(f"Saved metadata to {file_path}")
         return file_path
@@ -326,23 +702,36 @@ class ContentManager:
         """
         index_path = f"{self.workdir}/content_index.html"
         
+        # The index links to files that exist, so queued writes go first
+        self.flush()
+        
         # Get list of HTML items
-        html_items_dir = f"{self.workdir}/html_items"
+        html_items_dir = self._html_items_dir
         if not os.path.exists(html_items_dir):
             return None
             
-        html_items = [d for d in os.listdir(html_items_dir) 
-                     if os.path.isdir(os.path.join(html_items_dir, d))]
+        # Scan each item directory and its batch directories once, recording
+        # (item, file names, [(batch, file names), ...]) for every item
+        html_items = []
+        for item in _list_dir(html_items_dir, dirs_only=True):
+            item_dir = os.path.join(html_items_dir, item)
+            batches_dir = os.path.join(item_dir, "batches")
+            batches = sorted(
+                name for name in _list_dir(batches_dir, dirs_only=True)
+                if name.startswith("batch_")
+            )
+            html_items.append((
+                item,
+                set(_list_dir(item_dir)),
+                [(batch, set(_list_dir(os.path.join(batches_dir, batch)))) for batch in batches]
+            ))
         
         # Get terminology files
-        terminology_dir = f"{self.workdir}/terminology"
-        terminology_files = []
-        if os.path.exists(terminology_dir):
-            terminology_files = [f for f in os.listdir(terminology_dir) 
-                                if f.endswith('.csv')]
+        terminology_files = [f for f in _list_dir(self._terminology_dir)
+                             if f.endswith('.csv')]
         
         # Create HTML content
-        html_content = f"""
+        parts = [f"""
         <!DOCTYPE html>
         <html lang="zh-CN">
         <head>
@@ -422,18 +811,18 @@ class ContentManager:
                             <th>文件名</th>
                             <th>链接</th>
                         </tr>
-        """
+        """]
         
         # Add terminology files
         for file in terminology_files:
-            html_content += f"""
+            parts.append(f"""
                         <tr>
                             <td>{file}</td>
                             <td><a href="terminology/{file}" target="_blank">查看</a></td>
                         </tr>
-            """
+            """)
         
-        html_content += f"""
+        parts.append(f"""
                     </table>
                 </div>
                 
@@ -476,56 +865,34 @@ class ContentManager:
                             <th>翻译后文本</th>
                             <th>批次</th>
                         </tr>
-        """
+        """)
         
         # Add HTML items
-        for item in html_items:
-            item_dir = os.path.join(html_items_dir, item)
-            
-            # Check if original and translated files exist
-            original_html = os.path.join(item_dir, "original.html")
-            translated_html = os.path.join(item_dir, "translated.html")
-            original_txt = os.path.join(item_dir, "original.txt")
-            translated_txt = os.path.join(item_dir, "translated.txt")
+        for item, files, batches in html_items:
+            batch_count = len(batches)
             
-            # Count batches
-            batches_dir = os.path.join(item_dir, "batches")
-            batch_count = 0
-            if os.path.exists(batches_dir):
-                batch_count = len([d for d in os.listdir(batches_dir) 
-                                  if os.path.isdir(os.path.join(batches_dir, d)) and d.startswith("batch_")])
-            
-            html_content += f"""
+            parts.append(f"""
                         <tr>
                             <td>{item}</td>
-                            <td>{"<a href='html_items/"+item+"/original.html' target='_blank'>查看</a>" if os.path.exists(original_html) else "N/A"}</td>
-                            <td>{"<a href='html_items/"+item+"/translated.html' target='_blank'>查看</a>" if os.path.exists(translated_html) else "N/A"}</td>
-                            <td>{"<a href='html_items/"+item+"/original.txt' target='_blank'>查看</a>" if os.path.exists(original_txt) else "N/A"}</td>
-                            <td>{"<a href='html_items/"+item+"/translated.txt' target='_blank'>查看</a>" if os.path.exists(translated_txt) else "N/A"}</td>
+                            <td>{"<a href='html_items/"+item+"/original.html' target='_blank'>查看</a>" if "original.html" in files else "N/A"}</td>
+                            <td>{"<a href='html_items/"+item+"/translated.html' target='_blank'>查看</a>" if "translated.html" in files else "N/A"}</td>
+                            <td>{"<a href='html_items/"+item+"/original.txt' target='_blank'>查看</a>" if "original.txt" in files else "N/A"}</td>
+                            <td>{"<a href='html_items/"+item+"/translated.txt' target='_blank'>查看</a>" if "translated.txt" in files else "N/A"}</td>
                             <td>{"<a href='#"+item+"_batches'>"+str(batch_count)+"个批次</a>" if batch_count > 0 else "无批次"}</td>
                         </tr>
-            """
+            """)
         
-        html_content += f"""
+        parts.append(f"""
                     </table>
                 </div>
-        """
+        """)
         
         # Add sections for each HTML item's batches
-        for item in html_items:
-            item_dir = os.path.join(html_items_dir, item)
-            batches_dir = os.path.join(item_dir, "batches")
-            
-            if not os.path.exists(batches_dir):
-                continue
-                
-            batches = [d for d in os.listdir(batches_dir) 
-                      if os.path.isdir(os.path.join(batches_dir, d)) and d.startswith("batch_")]
-            
+        for item, _, batches in html_items:
             if not batches:
                 continue
                 
-            html_content += f"""
+            parts.append(f"""
                 <div class="card" id="{item}_batches">
                     <h2>项目 {item} 的批次 ({len(batches)}个)</h2>
                     <table>
@@ -537,79 +904,109 @@ class ContentManager:
                             <th>对照文本</th>
                             <th>技术信息</th>
                         </tr>
-            """
+            """)
             
-            # Sort batches by ID
-            batches.sort()
-            
-            for batch in batches:
-                batch_dir = os.path.join(batches_dir, batch)
-                
-                # Check for files
-                original_txt = os.path.join(batch_dir, "original.txt")
-                protected_txt = os.path.join(batch_dir, "protected.txt")
-                translated_txt = os.path.join(batch_dir, "translated.txt")
-                parallel_txt = os.path.join(batch_dir, "parallel.txt")
-                batch_info = os.path.join(batch_dir, "batch_info.json")
-                
-                html_content += f"""
+            for batch, batch_files in batches:
+                parts.append(f"""
                         <tr>
                             <td>{batch}</td>
-                            <td>{"<a href='html_items/"+item+"/batches/"+batch+"/original.txt' target='_blank'>查看</a>" if os.path.exists(original_txt) else "N/A"}</td>
-                            <td>{"<a href='html_items/"+item+"/batches/"+batch+"/protected.txt' target='_blank'>查看</a>" if os.path.exists(protected_txt) else "N/A"}</td>
-                            <td>{"<a href='html_items/"+item+"/batches/"+batch+"/translated.txt' target='_blank'>查看</a>" if os.path.exists(translated_txt) else "N/A"}</td>
-                            <td>{"<a href='html_items/"+item+"/batches/"+batch+"/parallel.txt' target='_blank'>查看</a>" if os.path.exists(parallel_txt) else "N/A"}</td>
-                            <td>{"<a href='html_items/"+item+"/batches/"+batch+"/batch_info.json' target='_blank'>查看</a>" if os.path.exists(batch_info) else "N/A"}</td>
+                            <td>{"<a href='html_items/"+item+"/batches/"+batch+"/original.txt' target='_blank'>查看</a>" if "original.txt" in batch_files else "N/A"}</td>
+                            <td>{"<a href='html_items/"+item+"/batches/"+batch+"/protected.txt' target='_blank'>查看</a>" if "protected.txt" in batch_files else "N/A"}</td>
+                            <td>{"<a href='html_items/"+item+"/batches/"+batch+"/translated.txt' target='_blank'>查看</a>" if "translated.txt" in batch_files else "N/A"}</td>
+                            <td>{"<a href='html_items/"+item+"/batches/"+batch+"/parallel.txt' target='_blank'>查看</a>" if "parallel.txt" in batch_files else "N/A"}</td>
+                            <td>{"<a href='html_items/"+item+"/batches/"+batch+"/batch_info.json' target='_blank'>查看</a>" if "batch_info.json" in batch_files else "N/A"}</td>
                         </tr>
-                """
+                """)
             
-            html_content += f"""
+            parts.append(f"""
                     </table>
                 </div>
-            """
+            """)
         
-        html_content += f"""
+        parts.append(f"""
             </div>
         </body>
         </html>
-        """
+        """)
         
         # Write HTML file
-        with open(index_path, 'w', encoding='utf-8') as f:
-            f.write(html_content)
+        self._submit(_write_text, index_path, ''.join(parts))
         
         logger.debug(f"Created HTML index at {index_path}")
         return index_path
     
-    def _extract_text_from_html(self, html_content):
-        """Extract text content from HTML.
+    def _parse_item(self, item, is_translated):
+        """Decode and parse an HTML item's content.
+        
+        The result is cached, so saving the same item with save_html_item
+        and save_chapter_content only parses it once. A cached result is
+        only reused while the item's content is unchanged.
+        
+        Args:
+            item: ebooklib.epub.EpubHtml item
+            is_translated: Whether content is translated
+            
+        Returns:
+            Tuple of (content, text content, title or None)
+        """
+        raw = item.get_content()
+        key = (item.get_id(), is_translated)
+        
+        with self._html_cache_lock:
+            cached = self._html_cache.get(key)
+            if cached is not None and cached[0] == raw:
+                self._html_cache.move_to_end(key)
+                return cached[1]
+        
+        # Parse outside the lock so other items are not held up
+        content = raw.decode('utf-8')
+        parsed = (content,) + self._extract_text_and_title(content)
+        
+        with self._html_cache_lock:
+            self._html_cache[key] = (raw, parsed)
+            self._html_cache.move_to_end(key)
+            if len(self._html_cache) > self.HTML_CACHE_SIZE:
+                self._html_cache.popitem(last=False)
+        return parsed
+    
+    def _extract_text_and_title(self, html_content):
+        """Extract text content and title from HTML with a single parse.
         
         Args:
             html_content: HTML content
             
         Returns:
-            Extracted text content
+            Tuple of (text content, title or None). The title is the text of
+            the first h1-h4 or title element.
         """
+        # lxml refuses to parse an empty document
+        if not html_content.strip():
+            return "", None
+        
         try:
-            soup = BeautifulSoup(html_content, 'html.parser')
-            
-            # Remove script and style elements
-            for script in soup(["script", "style"]):
-                script.extract()
-            
-            # Get text
-            text = soup.get_text()
-            
-            # Break into lines and remove leading and trailing space on each
-            lines = (line.strip() for line in text.splitlines())
-            
-            # Break multi-headlines into a line each
-            chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-            
-            # Drop blank lines
-            text = '\n'.join(chunk for chunk in chunks if chunk)
+            root = lxml_html.fromstring(html_content.encode('utf-8'), parser=_HTML_PARSER)
+        except Exception as e:
+            logger.error(f"Error parsing HTML: {e}")
+            return "Error extracting text", None
+        
+        title = None
+        try:
+            title_tag = next(root.iter('h1', 'h2', 'h3', 'h4', 'title'), None)
+            if title_tag is not None:
+                title = title_tag.text_content().strip() or None
+        except Exception as e:
+            logger.error(f"Error extracting chapter title: {e}")
+        
+        try:
+            # Remove script and style elements, keeping the text after them
+            etree.strip_elements(root, 'script', 'style', with_tail=False)
             
-            return text
+            # Break multi-headlines into a line each, strip each line and
+            # drop blank lines
+            text = _MULTISPACE.sub('\n', root.text_content())
+            text = '\n'.join(filter(None, map(str.strip, text.splitlines())))
         except Exception as e:
             logger.error(f"Error extracting text from HTML: {e}")
-            return "Error extracting text"
+            text = "Error extracting text"
+        
+        return text, title
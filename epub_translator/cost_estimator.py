@@ -8,8 +8,7 @@ based on content size and time of day (Beijing time).
 """
 
 import logging
-import pytz
-from datetime import datetime, time
+from datetime import datetime, timedelta, timezone
 
 logger = logging.getLogger("epub_translator.cost_estimator")
 
@@ -31,25 +30,35 @@ DEEPSEEK_PRICING = {
     }
 }
 
+# (pricing period, model) -> (input price, output price) per 1000 tokens
+_PRICES = {
+    (period, model): (pricing[model], pricing[model + "-response"])
+    for period, pricing in DEEPSEEK_PRICING.items()
+    for model in pricing if not model.endswith("-response")
+}
+
 # Token estimation factors
 CHARS_PER_TOKEN = 5  # Average characters per token (rough estimate)
 TERMINOLOGY_TOKEN_FACTOR = 0.3  # Terminology phase uses about 30% of total tokens
 TRANSLATION_INPUT_OUTPUT_RATIO = 2.0  # Output tokens are about 2x input tokens for translation
 
+# Pricing hours follow Beijing time. zoneinfo needs Python 3.9 and, on
+# Windows, the tzdata package; China has not observed daylight saving time
+# since 1991, so a fixed UTC+8 offset is equivalent when it is unavailable.
+try:
+    from zoneinfo import ZoneInfo
+    _BEIJING_TZ = ZoneInfo('Asia/Shanghai')
+except Exception:
+    _BEIJING_TZ = timezone(timedelta(hours=8), 'Asia/Shanghai')
+
 def is_peak_hour_beijing():
     """Determine if current time is peak pricing hours in Beijing.
     
     Returns:
         Boolean indicating if it's peak pricing hours (8:00-24:00 Beijing time)
     """
-    beijing_tz = pytz.timezone('Asia/Shanghai')
-    beijing_time = datetime.now(beijing_tz).time()
-    
     # Peak hours: 8:00 - 24:00 Beijing time
-    peak_start = time(8, 0)
-    peak_end = time(23, 59, 59)
-    
-    return peak_start <= beijing_time <= peak_end
+    return datetime.now(_BEIJING_TZ).hour >= 8
 
 def get_current_pricing():
     """Get current pricing based on Beijing time.
@@ -83,21 +92,22 @@ def estimate_api_cost(char_count, model="deepseek-chat"):
     Returns:
         Dictionary with cost estimates for terminology and translation phases
     """
-    # Get current pricing
-    pricing = get_current_pricing()
+    # Get current pricing, checking the time only once
+    peak = is_peak_hour_beijing()
+    input_price, output_price = _PRICES[("peak" if peak else "off_peak", model)]
     
     # Convert characters to tokens
     total_tokens = chars_to_tokens(char_count)
     
     # Estimate terminology phase cost
     terminology_tokens = total_tokens * TERMINOLOGY_TOKEN_FACTOR
-    terminology_cost = (terminology_tokens / 1000) * pricing[model]
+    terminology_cost = (terminology_tokens / 1000) * input_price
     
     # Estimate translation phase cost
     translation_input_tokens = total_tokens
     translation_output_tokens = total_tokens * TRANSLATION_INPUT_OUTPUT_RATIO
-    translation_input_cost = (translation_input_tokens / 1000) * pricing[model]
-    translation_output_cost = (translation_output_tokens / 1000) * pricing[model + "-response"]
+    translation_input_cost = (translation_input_tokens / 1000) * input_price
+    translation_output_cost = (translation_output_tokens / 1000) * output_price
     translation_cost = translation_input_cost + translation_output_cost
     
     # Total cost
@@ -111,8 +121,8 @@ def estimate_api_cost(char_count, model="deepseek-chat"):
         "translation_input_tokens": translation_input_tokens,
         "translation_output_tokens": translation_output_tokens,
         "total_tokens": terminology_tokens + translation_input_tokens + translation_output_tokens,
-        "is_peak_pricing": is_peak_hour_beijing(),
-        "pricing_period": "Peak (8:00-24:00 Beijing)" if is_peak_hour_beijing() else "Off-peak (0:00-8:00 Beijing)"
+        "is_peak_pricing": peak,
+        "pricing_period": "Peak (8:00-24:00 Beijing)" if peak else "Off-peak (0:00-8:00 Beijing)"
     }
 
 def format_cost_estimate(cost_estimate):
@@ -2,27 +2,28 @@
 # -*- coding: utf-8 -*-
 
 """
-Script to download NLTK data required for the EPUB translator.
-Run this script before using the translator to avoid download issues during processing.
+Script to download NLTK data used by the EPUB translator.
+NLTK is optional: when it is installed and this data has been downloaded,
+its punkt tokenizer is used for sentence splitting instead of a regular
+expression. The translator never downloads it itself.
 """
 
 import os
 import sys
-import nltk
-import ssl
 import time
 
+try:
+    import nltk
+except ImportError:
+    nltk = None
+
 def download_nltk_data():
     """Download required NLTK data with robust error handling."""
-    print("Downloading NLTK punkt tokenizer data...")
+    if nltk is None:
+        print("NLTK is not installed, install it with: pip install nltk")
+        return False
     
-    # Disable SSL verification to avoid download issues
-    try:
-        _create_unverified_https_context = ssl._create_unverified_context
-        ssl._create_default_https_context = _create_unverified_https_context
-        print("SSL verification disabled for NLTK download")
-    except AttributeError:
-        print("Unable to disable SSL verification, continuing with default SSL context")
+    print("Downloading NLTK punkt tokenizer data...")
 
     try:
         # Check if data already exists
@@ -32,6 +32,7 @@ from epub_translator.epub_processor_utils import (
     _extract_toc_text,
     _extract_text_from_item,
     _update_segment,
+    _record_translated,
     _extract_translatable_segments
 )
 
@@ -49,6 +50,7 @@ EPUBProcessor._extract_terminology = _dummy_extract_terminology
 EPUBProcessor._extract_toc_text = _extract_toc_text
 EPUBProcessor._extract_text_from_item = _extract_text_from_item
 EPUBProcessor._update_segment = _update_segment
+EPUBProcessor._record_translated = _record_translated
 EPUBProcessor._extract_translatable_segments = _extract_translatable_segments
 
 # Keep the EPUBProcessor class at the module level for backward compatibility
@@ -9,10 +9,12 @@ initialization, configuration, and signal handling.
 import os
 import logging
 import signal
+import sqlite3
 import sys
 import threading
 from collections import Counter
-import nltk
+
+from epub_translator.translation_store import TranslationCache, TranslationStore, DEFAULT_DB_NAME
 
 # Configure logger
 logger = logging.getLogger("epub_translator.epub_processor")
@@ -26,42 +28,35 @@ try:
     CHECKPOINT_SUPPORT = True
 except ImportError:
     logger.warning("Checkpoint support modules not found, running without checkpoint capabilities")
+    CheckpointManager = ProgressTracker = ContentManager = TextDivider = None
     CHECKPOINT_SUPPORT = False
 
-# Try to ensure NLTK data is available for smart text splitting
-try:
-    nltk.data.find('tokenizers/punkt')
-except LookupError:
-    logger.info("Downloading NLTK punkt tokenizer for smart text splitting")
-    # Disable SSL verification to avoid download issues
-    try:
-        import ssl
-        _create_unverified_https_context = ssl._create_unverified_context
-    except AttributeError:
-        pass
-    else:
-        ssl._create_default_https_context = _create_unverified_https_context
-    
-    # Set a timeout for the download to prevent hanging
-    nltk.download('punkt', quiet=True, timeout=30)
-
 
 class EPUBProcessor:
     """Processor for translating EPUB files."""
     
     # Elements that should not be translated
-    SKIP_TAGS = {
+    SKIP_TAGS = frozenset({
         'script', 'style', 'code', 'pre', 'head', 'math', 'svg', 'video',
         'audio', 'iframe', 'canvas', 'object', 'embed', 'noscript',
-    }
+    })
     
     # Attributes that may contain translatable text
-    TRANSLATABLE_ATTRS = {
+    TRANSLATABLE_ATTRS = frozenset({
         'alt', 'title', 'aria-label', 'placeholder'
-    }
+    })
+    
+    # Parser for chapters whose segments are extracted, translated and
+    # written back. Every such site must use the same parser, since the batch
+    # segment indices saved when preparing refer to its tree. Chapters are
+    # XHTML: lxml's HTML parser would open self-closed elements such as
+    # <a id="..."/> around the following content, so the output keeps using
+    # html.parser. Text-only reads use lxml.
+    HTML_PARSER = 'html.parser'
     
     def __init__(self, translator=None, term_extractor=None, batch_size=10, auto_extract_terms=True, 
-                 max_workers=4, chunk_size=5000, config=None, local_only=False):
+                 max_workers=4, chunk_size=5000, config=None, local_only=False,
+                 max_batch_chars=4000):
         """Initialize EPUB processor.
         
         Args:
@@ -73,6 +68,7 @@ class EPUBProcessor:
             chunk_size: Size of content chunks for processing (in characters)
             config: Configuration object (optional)
             local_only: Whether to only perform local processing (no API calls)
+            max_batch_chars: Maximum characters in one batch, 0 for no limit
         """
         self.translator = translator
         self.term_extractor = term_extractor
@@ -80,7 +76,11 @@ class EPUBProcessor:
         self.auto_extract_terms = auto_extract_terms
         self.max_workers = max_workers
         self.chunk_size = chunk_size
-        self.translation_cache = {}
+        self.max_batch_chars = max_batch_chars
+        # Shared by the worker threads; bounded so large books do not keep
+        # every translation in memory (the translation store keeps them all)
+        cache_size = config.getint('processing', 'translation_cache_size', fallback=50000) if config else 50000
+        self.translation_cache = TranslationCache(cache_size)
         self.total_chars = 0
         self.total_segments = 0
         self.translated_chars = 0
@@ -89,6 +89,11 @@ class EPUBProcessor:
         self.config = config
         self.local_only = local_only
         
+        # Translations kept across runs; not needed for local-only processing
+        self.translation_store = None
+        if config and not local_only and config.getboolean('processing', 'cache_translations', fallback=True):
+            self.translation_store = self._open_translation_store(config)
+        
         # Checkpoint and progress tracking support
         self.checkpoint_manager = None
         self.progress_tracker = None
@@ -101,6 +106,24 @@ class EPUBProcessor:
         # Signal handling for graceful termination
         self._setup_signal_handlers()
     
+    def _open_translation_store(self, config):
+        """Open the persistent translation store named by the configuration.
+        
+        Args:
+            config: Configuration object
+        
+        Returns:
+            TranslationStore instance, or None if it cannot be opened
+        """
+        path = config.get('processing', 'cache_db', fallback='')
+        if not path:
+            path = os.path.join(config.get('processing', 'cache_dir'), DEFAULT_DB_NAME)
+        try:
+            return TranslationStore(path)
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"Translation store {path} unavailable, translations will not be kept: {e}")
+            return None
+    
     def _setup_signal_handlers(self):
         """Set up signal handlers for graceful termination."""
         if sys.platform != 'win32':  # Not all signals available on Windows
@@ -115,3 +138,9 @@ class EPUBProcessor:
         if self.progress_tracker:
             self.progress_tracker._print_progress("Translation interrupted, checkpoint saved", newline=True)
         sys.exit(1)
+    
+    def _close_content_manager(self):
+        """Write the content manager's queued files and release it."""
+        if self.content_manager is not None:
+            self.content_manager.close()
+            self.content_manager = None
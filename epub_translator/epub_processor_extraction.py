@@ -11,11 +11,18 @@ import os
 import logging
 import time
 import re
-import os
 from bs4 import BeautifulSoup
 import ebooklib
 from ebooklib import epub
 
+# Checkpoint support is probed once, in the core module
+from epub_translator.epub_processor_core import (
+    CHECKPOINT_SUPPORT, CheckpointManager, ProgressTracker, ContentManager
+)
+from epub_translator.epub_processor_utils import (
+    _extract_metadata, _extract_translatable_segments
+)
+
 # Configure logger
 logger = logging.getLogger("epub_translator.epub_processor")
 
@@ -51,10 +58,10 @@ def extract_and_prepare_content(self, input_path, output_path=None, force_restar
     start_time = time.time()
     
     # Initialize checkpoint and progress tracking if supported
-    if hasattr(self, 'checkpoint_manager') and self.checkpoint_manager is None and CHECKPOINT_SUPPORT:
+    if self.checkpoint_manager is None and CHECKPOINT_SUPPORT:
         self.checkpoint_manager = CheckpointManager(input_path, output_path, self.config)
         self.progress_tracker = ProgressTracker(self.checkpoint_manager)
-        self.content_manager = ContentManager(self.checkpoint_manager.workdir)
+        self.content_manager = ContentManager(self.checkpoint_manager.workdir, self.config)
         
         # Set up progress tracker
         self.progress_tracker.setup(self.checkpoint_manager.workdir)
@@ -107,7 +114,6 @@ def extract_and_prepare_content(self, input_path, output_path=None, force_restar
                 self.progress_tracker._print_progress("Extracting EPUB content...", newline=True)
             
             # Extract metadata we want to preserve
-            from epub_translator.epub_processor_utils import _extract_metadata
             metadata = _extract_metadata(self, book)
             
             # Save original metadata if we have content manager
@@ -122,6 +128,10 @@ def extract_and_prepare_content(self, input_path, output_path=None, force_restar
             
             # Mark content extraction as completed
             if self.checkpoint_manager:
+                # Content files are written in the background; they must be
+                # on disk before the step is recorded as completed
+                if self.content_manager:
+                    self.content_manager.flush()
                 self.checkpoint_manager.update_local_processing_phase("content_extraction_completed", True, 
                                                                      items_count=len(html_items))
         else:
@@ -149,23 +159,14 @@ def extract_and_prepare_content(self, input_path, output_path=None, force_restar
             # Save each item as a chapter
             for item in html_items:
                 if self.content_manager:
-                    # Extract chapter title from content for better organization
-                    content = item.get_content().decode('utf-8')
-                    soup = BeautifulSoup(content, 'html.parser')
-                    chapter_title = None
-                    try:
-                        title_tag = soup.find(['h1', 'h2', 'h3', 'title'])
-                        if title_tag:
-                            chapter_title = title_tag.get_text().strip()
-                    except Exception:
-                        pass
-                    
-                    # Save chapter content
-                    self.content_manager.save_chapter_content(item, chapter_title=chapter_title, is_translated=False)
+                    # Save chapter content, titled from its first heading
+                    self.content_manager.save_chapter_content(item, is_translated=False)
                     chapter_count += 1
             
             # Mark chapter organization as completed
             if self.checkpoint_manager:
+                if self.content_manager:
+                    self.content_manager.flush()
                 self.checkpoint_manager.update_local_processing_phase("chapter_organization_completed", True,
                                                                     chapter_count=chapter_count)
                 
@@ -195,16 +196,14 @@ def extract_and_prepare_content(self, input_path, output_path=None, force_restar
             for item in html_items:
                 item_id = item.get_id()
                 
-                # Get content and create BeautifulSoup object
-                content = item.get_content().decode('utf-8')
-                soup = BeautifulSoup(content, 'html.parser')
+                # Parse the raw content; it is decoded as UTF-8 by the parser
+                soup = BeautifulSoup(item.get_content(), self.HTML_PARSER, from_encoding='utf-8')
                 
                 # Save HTML item
                 if self.content_manager:
                     self.content_manager.save_html_item(item)
                 
                 # Extract translatable segments
-                from epub_translator.epub_processor_utils import _extract_translatable_segments
                 translatable_segments = _extract_translatable_segments(self, soup, item_id=item_id)
                 total_segments += len(translatable_segments)
                 
@@ -223,7 +222,8 @@ def extract_and_prepare_content(self, input_path, output_path=None, force_restar
                 # 然后将优化后的段落分成批次
                 batches = self.text_divider.group_into_content_aware_batches(
                     optimized_segments,
-                    batch_size=self.batch_size
+                    batch_size=self.batch_size,
+                    max_chars=self.max_batch_chars
                 )
                 total_batches += len(batches)
                 
@@ -237,7 +237,9 @@ def extract_and_prepare_content(self, input_path, output_path=None, force_restar
                     "completed": False
                 }
                 
-                # Process and save each batch's details
+                # Process and save each batch's details; batches vary in
+                # size, so each one's indices start where the previous ended
+                batch_start = 0
                 for i, batch in enumerate(batches):
                     # Extract batch text
                     texts = [segment[2] for segment in batch]
@@ -245,17 +247,17 @@ def extract_and_prepare_content(self, input_path, output_path=None, force_restar
                     # Create unique batch identifier
                     batch_key = f"{item_id.replace('/', '_')}_{i:03d}"
                     
-                    # Save batch texts
+                    # Save batch texts and details
                     if self.content_manager:
-                        self.content_manager.save_batch(item_id, i, batch)
+                        self.content_manager.save_batch_soa(
+                            item_id,
+                            i,
+                            [type(segment[0]).__name__ if segment[0] else None for segment in batch],
+                            [segment[1] for segment in batch],
+                            texts
+                        )
                         self.content_manager.save_batch_standalone(item_id, i, texts)
                     
-                        # Save batch details
-                        if self.content_manager:
-                            self.content_manager.save_batch(
-                                item_id, i, batch
-                            )
-                    
                     # Save batch status
                     if self.checkpoint_manager:
                         batch_status = {
@@ -273,10 +275,11 @@ def extract_and_prepare_content(self, input_path, output_path=None, force_restar
                     # Update batch info
                     batch_info["batches"].append({
                         "batch_id": i,
-                        "segment_indices": list(range(i * self.batch_size, min((i + 1) * self.batch_size, len(translatable_segments)))),
+                        "segment_indices": list(range(batch_start, batch_start + len(batch))),
                         "completed": False,
                         "batch_key": batch_key
                     })
+                    batch_start += len(batch)
                 
                 # Save batch info
                 if self.checkpoint_manager:
@@ -290,6 +293,8 @@ def extract_and_prepare_content(self, input_path, output_path=None, force_restar
             
             # Mark batch division as completed
             if self.checkpoint_manager:
+                if self.content_manager:
+                    self.content_manager.flush()
                 self.checkpoint_manager.update_local_processing_phase("batch_division_completed", True,
                                                                      total_segments=total_segments,
                                                                      total_batches=total_batches,
@@ -323,9 +328,11 @@ def extract_and_prepare_content(self, input_path, output_path=None, force_restar
         if self.checkpoint_manager:
             self.checkpoint_manager.update_local_processing_phase("translation_preparation_completed", True)
         
-        # Create content index
+        # Create content index; translation starts its own content manager,
+        # so this one's writer threads are stopped
         if self.content_manager:
             self.content_manager.create_html_index()
+            self._close_content_manager()
             
         # 现在可以安全地启用DeepSeek API，但只在非local_only模式下
         if not self.local_only and self.translator and hasattr(self.translator, 'enable_api'):
@@ -382,7 +389,7 @@ def extract_and_prepare_content(self, input_path, output_path=None, force_restar
             try:
                 # Get DeepSeek model name from config or use default
                 model = "deepseek-chat"
-                if hasattr(self, 'config') and self.config:
+                if self.config:
                     model = self.config.get('deepseek', 'model', fallback="deepseek-chat")
                 
                 # Estimate API costs
@@ -418,12 +425,3 @@ def extract_and_prepare_content(self, input_path, output_path=None, force_restar
             self.checkpoint_manager.save_checkpoint()
         raise
 
-# Add the missing import for CHECKPOINT_SUPPORT
-try:
-    from epub_translator.checkpoint_manager import CheckpointManager
-    from epub_translator.progress_tracker import ProgressTracker
-    from epub_translator.content_manager import ContentManager
-    CHECKPOINT_SUPPORT = True
-except ImportError:
-    logger.warning("Checkpoint support modules not found, running without checkpoint capabilities")
-    CHECKPOINT_SUPPORT = False
@@ -23,15 +23,37 @@ from bs4 import BeautifulSoup
 # Configure logger
 logger = logging.getLogger("epub_translator.epub_processor")
 
-# Import our custom modules conditionally to handle the case when they're not available
-try:
-    from epub_translator.checkpoint_manager import CheckpointManager
-    from epub_translator.progress_tracker import ProgressTracker
-    from epub_translator.content_manager import ContentManager
-    CHECKPOINT_SUPPORT = True
-except ImportError:
-    logger.warning("Checkpoint support modules not found, running without checkpoint capabilities")
-    CHECKPOINT_SUPPORT = False
+# Checkpoint support is probed once, in the core module
+from epub_translator.epub_processor_core import (
+    CHECKPOINT_SUPPORT, CheckpointManager, ProgressTracker, ContentManager
+)
+from epub_translator.epub_processor_utils import (
+    _dummy_extract_terminology, _extract_metadata, _extract_translatable_segments,
+    _record_translated, _save_translation_cache, _set_metadata, _update_segment
+)
+
+def _new_translated_book(book):
+    """Create the book that receives the translated chapters.
+    
+    The new book shares the original's images, stylesheets, fonts and other
+    non-document items by reference instead of deep-copying them. It has its
+    own item list, metadata, spine, table of contents and guide, so adding
+    chapters and setting metadata leave the original book untouched.
+    
+    Args:
+        book: ebooklib.epub.EpubBook instance read from the input file
+    
+    Returns:
+        ebooklib.epub.EpubBook without any document items
+    """
+    translated_book = copy.copy(book)
+    translated_book.items = [item for item in book.items
+                             if item.get_type() != ebooklib.ITEM_DOCUMENT]
+    translated_book.metadata = copy.deepcopy(book.metadata)
+    translated_book.spine = list(book.spine)
+    translated_book.toc = list(book.toc)
+    translated_book.guide = list(book.guide)
+    return translated_book
 
 def translate_prepared_content(self, input_path, output_path, force_restart=False):
     """Translate prepared content from workdir and save to output_path.
@@ -56,7 +78,8 @@ def translate_prepared_content(self, input_path, output_path, force_restart=Fals
     if CHECKPOINT_SUPPORT:
         self.checkpoint_manager = CheckpointManager(input_path, output_path, self.config)
         self.progress_tracker = ProgressTracker(self.checkpoint_manager)
-        self.content_manager = ContentManager(self.checkpoint_manager.workdir)
+        self._close_content_manager()
+        self.content_manager = ContentManager(self.checkpoint_manager.workdir, self.config)
         
         # Set up progress tracker
         self.progress_tracker.setup(self.checkpoint_manager.workdir)
@@ -72,7 +95,7 @@ def translate_prepared_content(self, input_path, output_path, force_restart=Fals
                     try:
                         with open(cache_path, 'r', encoding='utf-8') as f:
                             import json
-                            self.translation_cache = json.load(f)
+                            self.translation_cache.update(json.load(f))
                         logger.info(f"已恢复 {len(self.translation_cache)} 个缓存的翻译")
                     except Exception as e:
                         logger.error(f"恢复翻译缓存时出错: {e}")
@@ -98,11 +121,10 @@ def translate_prepared_content(self, input_path, output_path, force_restart=Fals
         # Load original EPUB to get basic structure
         book = epub.read_epub(input_path)
         
-        # Create a deep copy to avoid modifying the original
-        translated_book = copy.deepcopy(book)
+        # Create a book sharing the original's assets; chapters are added below
+        translated_book = _new_translated_book(book)
         
         # Extract metadata we want to preserve
-        from epub_translator.epub_processor_utils import _extract_metadata
         metadata = _extract_metadata(self, book)
         
         # Get batch details from checkpoint
@@ -276,13 +298,22 @@ def translate_prepared_content(self, input_path, output_path, force_restart=Fals
                     logger.error(f"Error loading translated item {item_id}: {e}")
                     # Continue with batch-based reconstruction
             
-            # Get content and create BeautifulSoup object for rebuilding
-            content = original_item.get_content().decode('utf-8')
-            soup = BeautifulSoup(content, 'html.parser')
+            # Parse the raw content for rebuilding; it is decoded as UTF-8
+            # by the parser without a separate str copy
+            soup = BeautifulSoup(original_item.get_content(), self.HTML_PARSER, from_encoding='utf-8')
             
-            # Load each batch and apply translations
+            # Find the translatable segments once, before any of them is
+            # replaced, so batch segment indices refer to the same list the
+            # extraction phase numbered; the batch info is also read once
+            translatable_segments = _extract_translatable_segments(self, soup, item_id=item_id)
+            batch_info = self.checkpoint_manager.load_batch_info(item_id)
+            
+            # Load each batch and apply translations, counting them for the
+            # statistics once the item is rebuilt
+            updated_segments = 0
+            updated_chars = 0
             for batch_id in sorted(batch_ids):
-                batch_file = f"{self.checkpoint_manager.workdir}/html_items/{item_id.replace('/', '_')}/batches/batch_{batch_id:03d}/translated.txt"
+                batch_file = f"{item_dir}/batches/batch_{batch_id:03d}/translated.txt"
                 
                 if not os.path.exists(batch_file):
                     logger.warning(f"Translated batch file not found: {batch_file}")
@@ -293,33 +324,28 @@ def translate_prepared_content(self, input_path, output_path, force_restart=Fals
                         translated_texts = f.read().split('\n---\n')
                     
                     # Get the segment indices for this batch
-                    batch_info = self.checkpoint_manager.load_batch_info(item_id)
                     if not batch_info or batch_id >= len(batch_info.get("batches", [])):
                         logger.warning(f"Batch info not found for {item_id}, batch {batch_id}")
                         continue
                         
                     segment_indices = batch_info["batches"][batch_id].get("segment_indices", [])
                     
-                    # Get all translatable segments to apply translations
-                    from epub_translator.epub_processor_utils import _extract_translatable_segments
-                    translatable_segments = _extract_translatable_segments(self, soup, item_id=item_id)
-                    
                     # Apply translations to segments
                     for idx, seg_idx in enumerate(segment_indices):
                         if idx < len(translated_texts) and seg_idx < len(translatable_segments):
                             element, attribute, _ = translatable_segments[seg_idx]
-                            from epub_translator.epub_processor_utils import _update_segment
-                            _update_segment(self, element, attribute, translated_texts[idx])
+                            updated_chars += _update_segment(self, element, attribute, translated_texts[idx])
+                            updated_segments += 1
                 except Exception as e:
                     logger.error(f"Error applying translations from batch {batch_id} to {item_id}: {e}")
+            _record_translated(self, updated_segments, updated_chars)
             
             # Create a new item with the translated content
-            translated_content = str(soup)
             translated_item = epub.EpubHtml(
                 uid=original_item.get_id(),
                 file_name=original_item.get_name(),
                 media_type="application/xhtml+xml",
-                content=translated_content.encode('utf-8')
+                content=soup.encode('utf-8')
             )
             
             # Copy properties
@@ -332,28 +358,14 @@ def translate_prepared_content(self, input_path, output_path, force_restart=Fals
             if self.content_manager:
                 self.content_manager.save_html_item(translated_item, is_translated=True)
                 
-                # Extract chapter title
-                chapter_title = None
-                try:
-                    translated_soup = BeautifulSoup(translated_content, 'html.parser')
-                    title_tag = translated_soup.find(['h1', 'h2', 'h3', 'title'])
-                    if title_tag:
-                        chapter_title = title_tag.get_text().strip()
-                except Exception:
-                    pass
-                
-                # Save chapter
-                self.content_manager.save_chapter_content(
-                    translated_item, 
-                    chapter_title=chapter_title, 
-                    is_translated=True
-                )
+                # Save chapter, titled from its first heading (the content
+                # manager reuses the parse from save_html_item)
+                self.content_manager.save_chapter_content(translated_item, is_translated=True)
         
-        # Add translated items to the book
+        # Add translated items to the book, keeping the original of any
+        # item that has no translation
         for item in html_items:
-            item_id = item.get_id()
-            if item_id in results and results[item_id]:
-                translated_book.add_item(results[item_id])
+            translated_book.add_item(results.get(item.get_id()) or item)
         
         # Mark translation phase as completed
         if self.progress_tracker:
@@ -366,6 +378,8 @@ def translate_prepared_content(self, input_path, output_path, force_restart=Fals
             )
         
         if self.checkpoint_manager:
+            if self.content_manager:
+                self.content_manager.flush()
             self.checkpoint_manager.update_translation_phase(
                 completed=True,
                 translated_segments=self.translated_segments,
@@ -379,7 +393,6 @@ def translate_prepared_content(self, input_path, output_path, force_restart=Fals
             self.progress_tracker.start_phase("postprocessing", "Applying final processing to translated content")
         
         # Set metadata in translated book
-        from epub_translator.epub_processor_utils import _set_metadata
         _set_metadata(self, translated_book, metadata)
         
         # Save translated metadata
@@ -395,6 +408,8 @@ def translate_prepared_content(self, input_path, output_path, force_restart=Fals
             self.progress_tracker.update_postprocessing_progress(is_completed=True)
         
         if self.checkpoint_manager:
+            if self.content_manager:
+                self.content_manager.flush()
             self.checkpoint_manager.update_postprocessing_phase(completed=True)
         
         # Create HTML report
@@ -406,9 +421,11 @@ def translate_prepared_content(self, input_path, output_path, force_restart=Fals
             self.content_manager.create_html_index()
         
         # Save translation cache
-        from epub_translator.epub_processor_utils import _save_translation_cache
         _save_translation_cache(self)
         
+        # Content files are complete, stop the writer threads
+        self._close_content_manager()
+        
         # Return statistics
         end_time = time.time()
         processing_time = end_time - start_time
@@ -436,6 +453,73 @@ def translate_prepared_content(self, input_path, output_path, force_restart=Fals
             self.checkpoint_manager.save_checkpoint()
         raise
 
+def _translate_texts(self, texts):
+    """Translate texts that are not in the in-memory translation cache.
+    
+    Each distinct text is looked up and translated once, however often it
+    repeats. Translations kept in the persistent store from earlier runs are
+    reused; the other texts are sent to the translator and their
+    translations are added to the store.
+    
+    Args:
+        texts: List of texts to translate
+    
+    Returns:
+        List of translated texts in the order of texts
+    """
+    unique_texts = list(dict.fromkeys(texts))
+    
+    store = self.translation_store
+    stored = {}
+    if store:
+        source_lang = self.translator.source_lang
+        target_lang = self.translator.target_lang
+        try:
+            stored = store.get_many(source_lang, target_lang, unique_texts)
+        except Exception as e:
+            logger.error(f"Error reading translation store: {e}")
+    
+    texts_to_request = [text for text in unique_texts if text not in stored]
+    if not texts_to_request:
+        logger.debug(f"All {len(unique_texts)} texts found in translation store")
+        return [stored[text] for text in texts]
+    
+    # 在线程池环境中使用异步可能导致问题
+    # 直接使用同步批量翻译方法，避免"Timeout context manager should be used inside a task"错误
+    try:
+        # 尝试使用标准的同步翻译方法
+        requested = self.translator.translate_batch(texts_to_request)
+    except Exception as e:
+        logger.error(f"标准翻译方法失败: {e}")
+        # 如果失败，尝试逐个翻译文本（最慢但最安全的方法）
+        requested = []
+        for text in texts_to_request:
+            try:
+                # 单个文本翻译通常更可靠
+                result = self.translator.translate_text(text)
+                requested.append(result)
+            except Exception as text_e:
+                logger.error(f"单个文本翻译失败: {text_e}")
+                # 如果翻译失败，返回原文
+                requested.append(text)
+    
+    # Texts returned unchanged are not stored, the translator returns the
+    # original text when a request fails
+    if store:
+        try:
+            store.put_many(source_lang, target_lang, [
+                (text, translation)
+                for text, translation in zip(texts_to_request, requested)
+                if translation and translation != text
+            ])
+        except Exception as e:
+            logger.error(f"Error writing translation store: {e}")
+    
+    # Fan the translations back out to every occurrence
+    translations = stored
+    translations.update(zip(texts_to_request, requested))
+    return [translations.get(text) for text in texts]
+
 def _translate_prepared_batch(self, item_id, batch_id, batch_key):
     """Translate a prepared batch from workdir.
     
@@ -472,9 +556,9 @@ def _translate_prepared_batch(self, item_id, batch_id, batch_key):
         cached_translations = []
         
         for i, text in enumerate(original_texts):
-            cache_key = text
-            if cache_key in self.translation_cache:
-                cached_translations.append((i, self.translation_cache[cache_key]))
+            cached = self.translation_cache.get(text)
+            if cached is not None:
+                cached_translations.append((i, cached))
             else:
                 translations_to_do.append(text)
                 indices_to_translate.append(i)
@@ -492,24 +576,7 @@ def _translate_prepared_batch(self, item_id, batch_id, batch_key):
                 # Use original texts
                 texts_to_translate = translations_to_do
             
-            # 在线程池环境中使用异步可能导致问题
-            # 直接使用同步批量翻译方法，避免"Timeout context manager should be used inside a task"错误
-            try:
-                # 尝试使用标准的同步翻译方法
-                translated_texts = self.translator.translate_batch(texts_to_translate)
-            except Exception as e:
-                logger.error(f"标准翻译方法失败: {e}")
-                # 如果失败，尝试逐个翻译文本（最慢但最安全的方法）
-                translated_texts = []
-                for text in texts_to_translate:
-                    try:
-                        # 单个文本翻译通常更可靠
-                        result = self.translator.translate_text(text)
-                        translated_texts.append(result)
-                    except Exception as text_e:
-                        logger.error(f"单个文本翻译失败: {text_e}")
-                        # 如果翻译失败，返回原文
-                        translated_texts.append(text)
+            translated_texts = _translate_texts(self, texts_to_translate)
             
             # Restore terminology
             if protected_texts and self.term_extractor:
@@ -599,7 +666,8 @@ def translate_epub(self, input_path, output_path, force_restart=False, local_onl
     if CHECKPOINT_SUPPORT:
         self.checkpoint_manager = CheckpointManager(input_path, output_path, self.config)
         self.progress_tracker = ProgressTracker(self.checkpoint_manager)
-        self.content_manager = ContentManager(self.checkpoint_manager.workdir)
+        self._close_content_manager()
+        self.content_manager = ContentManager(self.checkpoint_manager.workdir, self.config)
         
         # Set up progress tracker
         self.progress_tracker.setup(self.checkpoint_manager.workdir)
@@ -617,7 +685,7 @@ def translate_epub(self, input_path, output_path, force_restart=False, local_onl
                 if os.path.exists(f"{self.checkpoint_manager.workdir}/translation_cache.json"):
                     try:
                         with open(f"{self.checkpoint_manager.workdir}/translation_cache.json", 'r', encoding='utf-8') as f:
-                            self.translation_cache = json.load(f)
+                            self.translation_cache.update(json.load(f))
                         logger.info(f"Restored {len(self.translation_cache)} cached translations")
                     except Exception as e:
                         logger.error(f"Error restoring translation cache: {e}")
@@ -631,11 +699,10 @@ def translate_epub(self, input_path, output_path, force_restart=False, local_onl
     try:
         book = epub.read_epub(input_path)
         
-        # Create a deep copy to avoid modifying the original
-        translated_book = copy.deepcopy(book)
+        # Create a book sharing the original's assets; chapters are added below
+        translated_book = _new_translated_book(book)
         
         # Extract metadata we want to preserve
-        from epub_translator.epub_processor_utils import _extract_metadata
         metadata = _extract_metadata(self, book)
         
         # Save original metadata if we have content manager
@@ -680,7 +747,6 @@ def translate_epub(self, input_path, output_path, force_restart=False, local_onl
                 self.progress_tracker.start_phase("terminology", "Auto-extracting terminology from EPUB content")
             
             logger.info("Auto-extracting terminology from EPUB content")
-            from epub_translator.epub_processor_utils import _dummy_extract_terminology
             term_count = _dummy_extract_terminology(self, html_items)
             
             # Save terminology to file if we have content manager
@@ -725,12 +791,18 @@ def translate_epub(self, input_path, output_path, force_restart=False, local_onl
             self.translator.enable_api()
         
         # Check if we need to restart from a specific point based on checkpoint
-        completed_items = []
+        # (kept as a set for membership tests, the checkpoint stores a list)
+        completed_items = set()
         if (self.checkpoint_manager and not self.force_restart and 
             self.checkpoint_manager.state["phases"]["translation"].get("completed_items")):
-            completed_items = self.checkpoint_manager.state["phases"]["translation"]["completed_items"]
+            completed_items = set(self.checkpoint_manager.state["phases"]["translation"]["completed_items"])
             logger.info(f"Resuming translation: {len(completed_items)}/{len(html_items)} items already completed")
         
+        # Items already recorded as completed in the checkpoint
+        recorded_items = set()
+        if self.checkpoint_manager:
+            recorded_items = set(self.checkpoint_manager.state["phases"]["translation"].get("completed_items", []))
+        
         # Translate content with progress reporting
         logger.info(f"Translating EPUB content using {self.max_workers} parallel workers")
         
@@ -803,8 +875,12 @@ def translate_epub(self, input_path, output_path, force_restart=False, local_onl
                             
                             # Update list of completed items in checkpoint
                             if self.checkpoint_manager:
-                                completed_list = self.checkpoint_manager.state["phases"]["translation"].get("completed_items", [])
-                                if item_id not in completed_list:
+                                if item_id not in recorded_items:
+                                    recorded_items.add(item_id)
+                                    # Pass a new list rather than appending to the
+                                    # one in the state, which is saved under the
+                                    # checkpoint manager's lock
+                                    completed_list = list(self.checkpoint_manager.state["phases"]["translation"].get("completed_items", []))
                                     completed_list.append(item_id)
                                     self.checkpoint_manager.update_translation_phase(
                                         completed_items=completed_list,
@@ -815,18 +891,16 @@ def translate_epub(self, input_path, output_path, force_restart=False, local_onl
                             # Save translation cache periodically
                             if self.checkpoint_manager and self.translation_cache:
                                 if len(self.translation_cache) % 100 == 0:
-                                    from epub_translator.epub_processor_utils import _save_translation_cache
                                     _save_translation_cache(self)
                             
                         except Exception as e:
                             logger.error(f"Error translating item {item_id}: {str(e)}")
                             pbar.update(1)
             
-            # Add translated items to the book
+            # Add translated items to the book, keeping the original of any
+            # item that has no translation
             for item in html_items:
-                item_id = item.get_id()
-                if item_id in results and results[item_id]:
-                    translated_book.add_item(results[item_id])
+                translated_book.add_item(results.get(item.get_id()) or item)
             
             # Mark translation phase as completed
             if self.progress_tracker:
@@ -839,6 +913,8 @@ def translate_epub(self, input_path, output_path, force_restart=False, local_onl
                 )
             
             if self.checkpoint_manager:
+                if self.content_manager:
+                    self.content_manager.flush()
                 self.checkpoint_manager.update_translation_phase(
                     completed=True,
                     translated_segments=self.translated_segments,
@@ -852,7 +928,6 @@ def translate_epub(self, input_path, output_path, force_restart=False, local_onl
             self.progress_tracker.start_phase("postprocessing", "Applying final processing to translated content")
         
         # Set metadata in translated book
-        from epub_translator.epub_processor_utils import _set_metadata
         _set_metadata(self, translated_book, metadata)
         
         # Save translated metadata if we have content manager
@@ -868,6 +943,8 @@ def translate_epub(self, input_path, output_path, force_restart=False, local_onl
             self.progress_tracker.update_postprocessing_progress(is_completed=True)
         
         if self.checkpoint_manager:
+            if self.content_manager:
+                self.content_manager.flush()
             self.checkpoint_manager.update_postprocessing_phase(completed=True)
     
         # Create HTML report
@@ -879,9 +956,11 @@ def translate_epub(self, input_path, output_path, force_restart=False, local_onl
             self.content_manager.create_html_index()
         
         # Save final translation cache
-        from epub_translator.epub_processor_utils import _save_translation_cache
         _save_translation_cache(self)
         
+        # Content files are complete, stop the writer threads
+        self._close_content_manager()
+        
         # Return statistics
         end_time = time.time()
         processing_time = end_time - start_time
@@ -968,27 +1047,18 @@ def _translate_item_parallel(self, item, workdir=None):
         )
     
     try:
-        # Get content and create BeautifulSoup object
-        content = item.get_content().decode('utf-8')
-        soup = BeautifulSoup(content, 'html.parser')
+        # Parse the raw content; it is decoded as UTF-8 by the parser
+        soup = BeautifulSoup(item.get_content(), self.HTML_PARSER, from_encoding='utf-8')
         
         # Save original HTML and chapter content if we have a content manager
         item_dir = None
         if self.content_manager:
             item_dir = self.content_manager.save_html_item(item)
-            # Extract chapter title from content for better organization
-            chapter_title = None
-            try:
-                title_tag = soup.find(['h1', 'h2', 'h3', 'title'])
-                if title_tag:
-                    chapter_title = title_tag.get_text().strip()
-            except Exception:
-                pass
-            # Save original chapter content for easy access
-            self.content_manager.save_chapter_content(item, chapter_title=chapter_title, is_translated=False)
+            # Save original chapter content for easy access, titled from its
+            # first heading
+            self.content_manager.save_chapter_content(item, is_translated=False)
         
         # Find all text nodes that need translation
-        from epub_translator.epub_processor_utils import _extract_translatable_segments
         translatable_segments = _extract_translatable_segments(self, soup)
         
         # 使用段落分割器来优化翻译批次
@@ -1001,7 +1071,8 @@ def _translate_item_parallel(self, item, workdir=None):
         # 创建段落感知的批次
         batches = self.text_divider.group_into_content_aware_batches(
             optimized_segments,
-            batch_size=self.batch_size
+            batch_size=self.batch_size,
+            max_chars=self.max_batch_chars
         )
         
         # Save batch information for checkpointing
@@ -1014,125 +1085,68 @@ def _translate_item_parallel(self, item, workdir=None):
             "completed": False
         }
         
+        # Batches vary in size, so each one's indices start where the
+        # previous batch ended
+        batch_start = 0
         for i, batch in enumerate(batches):
             batch_info["batches"].append({
                 "batch_id": i,
-                "segment_indices": list(range(i * self.batch_size, min((i + 1) * self.batch_size, len(translatable_segments)))),
+                "segment_indices": list(range(batch_start, batch_start + len(batch))),
                 "completed": False
             })
+            batch_start += len(batch)
         
         # Save initial batch info
         if self.checkpoint_manager:
             self.checkpoint_manager.save_batch_info(item_id, batch_info)
         
-        # Process batches - either in parallel or sequentially
-        if len(batches) > 5:
-            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(batches))) as executor:
-                # Submit all batch translation tasks
-                futures = []
-                for i, batch in enumerate(batches):
-                    futures.append(executor.submit(
-                        _translate_batch, 
-                        self,
-                        batch,
-                        item_dir=item_dir,
-                        item_id=item_id,
-                        batch_id=i
-                    ))
-                
-                # Track completion
-                completed_count = 0
-                
-                # Wait for all to complete
-                for i, future in enumerate(as_completed(futures)):
-                    try:
-                        future.result()
-                        completed_count += 1
-                        
-                        # Update batch info
-                        if self.checkpoint_manager:
-                            batch_info["batches"][i]["completed"] = True
-                            self.checkpoint_manager.save_batch_info(item_id, batch_info)
-                        
-                        # Update progress
-                        if self.progress_tracker:
-                            # Calculate item progress
-                            item_progress = (completed_count / len(batches)) * 100
-                            
-                            # Update translation progress
-                            self.progress_tracker.update_translation_progress(
-                                translated_segments=self.translated_segments,
-                                total_segments=self.total_segments,
-                                translated_chars=self.translated_chars,
-                                total_chars=self.total_chars,
-                                current_item=item_id,
-                                item_progress=item_progress
-                            )
-                        
-                        # Update checkpoint
-                        if self.checkpoint_manager:
-                            self.checkpoint_manager.update_translation_phase(
-                                translated_segments=self.translated_segments,
-                                total_segments=self.total_segments,
-                                translated_chars=self.translated_chars,
-                                total_chars=self.total_chars,
-                                current_item=item_id,
-                                item_progress=item_progress
-                            )
-                            
-                    except Exception as e:
-                        logger.error(f"Error in batch translation: {str(e)}")
-        else:
-            # For small documents, process sequentially
-            for i, batch in enumerate(batches):
-                _translate_batch(
-                    self,
-                    batch,
-                    item_dir=item_dir,
-                    item_id=item_id,
-                    batch_id=i
+        # Process batches sequentially: the batches share this item's tree,
+        # which must not be modified from several threads, and chapters are
+        # already translated in parallel by translate_epub
+        for i, batch in enumerate(batches):
+            _translate_batch(
+                self,
+                batch,
+                item_dir=item_dir,
+                item_id=item_id,
+                batch_id=i
+            )
+            
+            # Update batch info
+            if self.checkpoint_manager:
+                batch_info["batches"][i]["completed"] = True
+                self.checkpoint_manager.save_batch_info(item_id, batch_info)
+            
+            # Update progress
+            item_progress = ((i + 1) / len(batches)) * 100
+            if self.progress_tracker:
+                # Update translation progress
+                self.progress_tracker.update_translation_progress(
+                    translated_segments=self.translated_segments,
+                    total_segments=self.total_segments,
+                    translated_chars=self.translated_chars,
+                    total_chars=self.total_chars,
+                    current_item=item_id,
+                    item_progress=item_progress
+                )
+            
+            # Update checkpoint
+            if self.checkpoint_manager:
+                self.checkpoint_manager.update_translation_phase(
+                    translated_segments=self.translated_segments,
+                    total_segments=self.total_segments,
+                    translated_chars=self.translated_chars,
+                    total_chars=self.total_chars,
+                    current_item=item_id,
+                    item_progress=item_progress
                 )
-                
-                # Update batch info
-                if self.checkpoint_manager:
-                    batch_info["batches"][i]["completed"] = True
-                    self.checkpoint_manager.save_batch_info(item_id, batch_info)
-                
-                # Update progress
-                if self.progress_tracker:
-                    # Calculate item progress
-                    item_progress = ((i + 1) / len(batches)) * 100
-                    
-                    # Update translation progress
-                    self.progress_tracker.update_translation_progress(
-                        translated_segments=self.translated_segments,
-                        total_segments=self.total_segments,
-                        translated_chars=self.translated_chars,
-                        total_chars=self.total_chars,
-                        current_item=item_id,
-                        item_progress=item_progress
-                    )
-                
-                # Update checkpoint
-                if self.checkpoint_manager:
-                    self.checkpoint_manager.update_translation_phase(
-                        translated_segments=self.translated_segments,
-                        total_segments=self.total_segments,
-                        translated_chars=self.translated_chars,
-                        total_chars=self.total_chars,
-                        current_item=item_id,
-                        item_progress=item_progress
-                    )
-        
-        # Update the content with translated text
-        translated_content = str(soup)
         
         # Create a new item for the translated book
         translated_item = epub.EpubHtml(
             uid=item.get_id(),
             file_name=item.get_name(),
             media_type="application/xhtml+xml",
-            content=translated_content.encode('utf-8')
+            content=soup.encode('utf-8')
         )
         
         # Copy properties
@@ -1142,18 +1156,9 @@ def _translate_item_parallel(self, item, workdir=None):
         if self.content_manager:
             self.content_manager.save_html_item(translated_item, is_translated=True)
             
-            # Extract chapter title from content for better organization
-            chapter_title = None
-            try:
-                translated_soup = BeautifulSoup(translated_content, 'html.parser')
-                title_tag = translated_soup.find(['h1', 'h2', 'h3', 'title'])
-                if title_tag:
-                    chapter_title = title_tag.get_text().strip()
-            except Exception:
-                pass
-            
-            # Save translated chapter content for easy access
-            self.content_manager.save_chapter_content(translated_item, chapter_title=chapter_title, is_translated=True)
+            # Save translated chapter content for easy access, titled from
+            # its first heading
+            self.content_manager.save_chapter_content(translated_item, is_translated=True)
         
         # Mark item as completed in batch info
         if self.checkpoint_manager:
@@ -1183,69 +1188,67 @@ def _translate_batch(self, segments, item_dir=None, item_id=None, batch_id=None)
         if not texts:
             return
         
-        # Check cache for translations
+        # Check cache for translations; _translate_texts sends a text
+        # repeated within the batch once
+        translation_cache = self.translation_cache
         translations_to_do = []
         indices_to_translate = []
         cached_translations = []
         
         for i, text in enumerate(texts):
-            cache_key = text
-            if cache_key in self.translation_cache:
-                cached_translations.append((i, self.translation_cache[cache_key]))
+            cached = translation_cache.get(text)
+            if cached is not None:
+                cached_translations.append((i, cached))
             else:
                 translations_to_do.append(text)
                 indices_to_translate.append(i)
         
-        # Save original batch content if we have a content manager
-        if self.content_manager and item_dir and item_id is not None and batch_id is not None:
-            self.content_manager.save_batch(item_id, batch_id, segments)
+        # Save original batch content if we have a content manager; the
+        # segment details are kept for the translated batch as well
+        save_content = (self.content_manager and item_dir
+                        and item_id is not None and batch_id is not None)
+        if save_content:
+            element_types = [type(segment[0]).__name__ if segment[0] else None for segment in segments]
+            attributes = [segment[1] for segment in segments]
+            self.content_manager.save_batch_soa(
+                item_id, batch_id, element_types, attributes, texts
+            )
         
         # Directly translate the original texts without terminology protection
         protected_texts = None
         if translations_to_do:
-            # 在线程池环境中使用异步可能导致问题
-            # 直接使用同步批量翻译方法，避免"Timeout context manager should be used inside a task"错误
-            try:
-                # 尝试使用标准的同步翻译方法
-                translated_texts = self.translator.translate_batch(translations_to_do)
-            except Exception as e:
-                logger.error(f"标准翻译方法失败: {e}")
-                # 如果失败，尝试逐个翻译文本（最慢但最安全的方法）
-                translated_texts = []
-                for text in translations_to_do:
-                    try:
-                        # 单个文本翻译通常更可靠
-                        result = self.translator.translate_text(text)
-                        translated_texts.append(result)
-                    except Exception as text_e:
-                        logger.error(f"单个文本翻译失败: {text_e}")
-                        # 如果翻译失败，返回原文
-                        translated_texts.append(text)
+            translated_texts = _translate_texts(self, translations_to_do)
             
             # Cache translations
             for i, text in enumerate(translations_to_do):
                 if i < len(translated_texts):
-                    self.translation_cache[text] = translated_texts[i]
+                    translation_cache[text] = translated_texts[i]
         else:
             translated_texts = []
         
-        # Update segments with translations
+        # Update segments with translations, recording the statistics once
+        # for the batch
+        updated_segments = 0
+        updated_chars = 0
+        
         # First, handle cached translations
         for idx, translation in cached_translations:
             if idx < len(segments):
                 element, attribute, original_text = segments[idx]
-                from epub_translator.epub_processor_utils import _update_segment
-                _update_segment(self, element, attribute, translation)
+                updated_chars += _update_segment(self, element, attribute, translation)
+                updated_segments += 1
         
         # Then, handle new translations
         for i, orig_idx in enumerate(indices_to_translate):
             if i < len(translated_texts) and orig_idx < len(segments):
                 element, attribute, original_text = segments[orig_idx]
-                from epub_translator.epub_processor_utils import _update_segment
-                _update_segment(self, element, attribute, translated_texts[i])
+                updated_chars += _update_segment(self, element, attribute, translated_texts[i])
+                updated_segments += 1
+        
+        _record_translated(self, updated_segments, updated_chars)
         
         # Save translated batch content if we have a content manager
-        if self.content_manager and item_dir and item_id is not None and batch_id is not None:
+        if save_content:
             # Collect all translated texts (both cached and new)
             all_translated_texts = [None] * len(texts)
             
@@ -1259,8 +1262,8 @@ def _translate_batch(self, segments, item_dir=None, item_id=None, batch_id=None)
                     all_translated_texts[orig_idx] = translated_texts[i]
             
             # Save batch to detailed location
-            self.content_manager.save_batch(
-                item_id, batch_id, segments, 
+            self.content_manager.save_batch_soa(
+                item_id, batch_id, element_types, attributes, texts,
                 translated_texts=all_translated_texts,
                 protected_texts=protected_texts
             )
@@ -12,12 +12,17 @@ import logging
 import re
 import json
 from collections import Counter
-import nltk
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, NavigableString, Tag
+from ebooklib.epub import NAMESPACES
 
 # Configure logger
 logger = logging.getLogger("epub_translator.epub_processor")
 
+# Text with nothing to translate: digits, punctuation and whitespace only
+# (page and chapter numbers, separators), or a bare URL
+_NON_TEXT_RE = re.compile(r'^[\W\d_]*$')
+_URL_RE = re.compile(r'^\s*(?:https?://|www\.)\S+\s*$', re.IGNORECASE)
+
 def _extract_metadata(self, book):
     """Extract metadata from the EPUB book.
     
@@ -49,9 +54,9 @@ def _set_metadata(self, book, metadata):
         book: ebooklib.epub.EpubBook instance
         metadata: Dictionary with metadata
     """
-    # Clear existing metadata
-    for item in list(book.metadata.values()):
-        book.metadata.pop(item, None)
+    # Clear the Dublin Core metadata, which is rebuilt below; OPF entries
+    # such as the cover image reference are kept
+    book.metadata.pop(NAMESPACES['DC'], None)
     
     # Translate title if available
     if metadata.get('title'):
@@ -76,8 +81,8 @@ def _set_metadata(self, book, metadata):
     # Copy other metadata unchanged
     for meta_type in ['publisher', 'identifier', 'date', 'rights', 'coverage']:
         if metadata.get(meta_type):
-            for item in metadata[meta_type]:
-                book.add_metadata('DC', meta_type, item[0])
+            for value, others in metadata[meta_type]:
+                book.add_metadata('DC', meta_type, value, others)
 
 def _save_translation_cache(self):
     """Save translation cache to file."""
@@ -123,8 +128,11 @@ def _extract_toc_text(self, html_items):
     Returns:
         String containing the table of contents text or empty string if not found
     """
-    # Look for common TOC identifiers in HTML items
-    toc_text = ""
+    # Look for common TOC identifiers in HTML items. Text pieces are
+    # collected in lists and joined once at the end; chapter titles come
+    # after all TOC text, but are found in the same parse of each item.
+    toc_parts = []
+    title_parts = []
     toc_identifiers = [
         'toc', 'contents', 'table-of-contents', 'tableofcontents', 
         'content-table', 'index', 'nav', 'catalog', 'menu'
@@ -132,14 +140,21 @@ def _extract_toc_text(self, html_items):
     
     # Try to find TOC by looking for nav elements and common TOC identifiers
     for item in html_items:
-        content = item.get_content().decode('utf-8')
-        soup = BeautifulSoup(content, 'html.parser')
+        soup = BeautifulSoup(item.get_content(), 'lxml', from_encoding='utf-8')
+        
+        # Also extract chapter titles, which likely contain domain
+        # terminology; read before TOC items have their skipped tags removed
+        headings = soup.find_all(['h1', 'h2'], limit=5)  # Limit to first few headings
+        for heading in headings:
+            heading_text = heading.get_text().strip()
+            if heading_text and len(heading_text.split()) > 1:  # Skip single-word headings
+                title_parts.append(heading_text)
         
         # Look for nav elements which often contain the TOC
         nav_elements = soup.find_all('nav')
         if nav_elements:
             for nav in nav_elements:
-                toc_text += nav.get_text() + "\n"
+                toc_parts.append(nav.get_text())
                 
         # Check if this item looks like a TOC based on ID/class/filename
         item_id = item.get_id().lower()
@@ -158,28 +173,17 @@ def _extract_toc_text(self, html_items):
             # Extract just the text from this item, skipping non-content elements
             for tag in soup.find_all(self.SKIP_TAGS):
                 tag.extract()
-            toc_text += soup.get_text() + "\n"
+            toc_parts.append(soup.get_text())
             
         # Look for headings with chapter/section indicators
         headings = soup.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6'])
         for heading in headings:
             heading_text = heading.get_text().strip()
             if heading_text:
-                toc_text += heading_text + "\n"
+                toc_parts.append(heading_text)
     
-    # Also extract chapter titles, which likely contain domain terminology
-    for item in html_items:
-        content = item.get_content().decode('utf-8')
-        soup = BeautifulSoup(content, 'html.parser')
-        
-        # Get main headings which are often chapter titles
-        headings = soup.find_all(['h1', 'h2'], limit=5)  # Limit to first few headings
-        for heading in headings:
-            heading_text = heading.get_text().strip()
-            if heading_text and len(heading_text.split()) > 1:  # Skip single-word headings
-                toc_text += heading_text + "\n"
-    
-    return toc_text
+    toc_parts.extend(title_parts)
+    return "".join(f"{part}\n" for part in toc_parts)
 
 def _extract_text_from_item(self, item):
     """Extract text content from an EPUB HTML item.
@@ -191,7 +195,7 @@ def _extract_text_from_item(self, item):
         Extracted text content
     """
     content = item.get_content().decode('utf-8')
-    soup = BeautifulSoup(content, 'html.parser')
+    soup = BeautifulSoup(content, 'lxml')
     
     # Extract text, avoiding script, style, etc.
     for tag in soup.find_all(self.SKIP_TAGS):
@@ -202,10 +206,16 @@ def _extract_text_from_item(self, item):
 def _update_segment(self, element, attribute, translated_text):
     """Update a segment with translated text.
     
+    The translation statistics are not updated here; callers add up the
+    returned lengths and record them once with _record_translated.
+    
     Args:
         element: BeautifulSoup element
         attribute: Attribute name or None for text content
         translated_text: Translated text
+    
+    Returns:
+        Length of the translated text
     """
     # Update the element
     if attribute is None:
@@ -215,10 +225,19 @@ def _update_segment(self, element, attribute, translated_text):
         # Attribute
         element[attribute] = translated_text
     
+    return len(translated_text)
+
+def _record_translated(self, segment_count, char_count):
+    """Add translated segments to the statistics.
+    
+    Args:
+        segment_count: Number of segments updated
+        char_count: Total length of their translated texts
+    """
     # Thread-safe increment of statistics
     with self.lock:
-        self.translated_segments += 1
-        self.translated_chars += len(translated_text)
+        self.translated_segments += segment_count
+        self.translated_chars += char_count
 
 def _extract_translatable_segments(self, soup, item_id=None):
     """Extract translatable text segments from BeautifulSoup object.
@@ -241,6 +260,8 @@ def _extract_translatable_segments(self, soup, item_id=None):
     
     segments = []
     processed_elements = set()
+    skip_tags = self.SKIP_TAGS
+    translatable_attrs = self.TRANSLATABLE_ATTRS
     
     # Additional skip patterns for special content like XML declarations, DOCTYPE, etc.
     skip_patterns = [
@@ -293,6 +314,10 @@ def _extract_translatable_segments(self, soup, item_id=None):
         """
         if not text or not text.strip():
             return True
+        
+        # Numbers, punctuation and URLs are kept as they are
+        if _NON_TEXT_RE.match(text) or _URL_RE.match(text):
+            return True
             
         # Check against standard skip patterns
         for pattern in skip_patterns:
@@ -325,11 +350,30 @@ def _extract_translatable_segments(self, soup, item_id=None):
             current = current.parent
         return None
         
+    # Walk the tree once, in document order, collecting text nodes and tags
+    # with whether they sit inside a non-translatable element; the passes
+    # below reuse these lists instead of searching the tree again
+    text_nodes_in_order = []  # (node, inside SKIP_TAGS)
+    tags_in_order = []  # (tag, is or inside SKIP_TAGS)
+    stack = [(iter(soup.contents), False)]
+    while stack:
+        children, in_skip = stack[-1]
+        for child in children:
+            if isinstance(child, NavigableString):
+                text_nodes_in_order.append((child, in_skip))
+            elif isinstance(child, Tag):
+                child_in_skip = in_skip or child.name in skip_tags
+                tags_in_order.append((child, child_in_skip))
+                stack.append((iter(child.contents), child_in_skip))
+                break
+        else:
+            stack.pop()
+    
     # First, group text nodes by their parent paragraphs to maintain context
     paragraph_to_nodes = {}
-    for node in soup.find_all(string=True):
+    for node, in_skip in text_nodes_in_order:
         # Skip if in non-translatable area
-        if node.parent.name in self.SKIP_TAGS or any(p.name in self.SKIP_TAGS for p in node.parent.parents):
+        if in_skip:
             continue
             
         # Skip empty nodes
@@ -349,11 +393,10 @@ def _extract_translatable_segments(self, soup, item_id=None):
         if parent_elem in processed_elements:
             continue
             
-        # Filter out nodes from non-translatable elements and those matching skip patterns
+        # Filter out nodes matching skip patterns (nodes in non-translatable
+        # elements were never grouped)
         text_nodes = [node for node in text_nodes 
-                     if node.parent.name not in self.SKIP_TAGS and 
-                     not any(p.name in self.SKIP_TAGS for p in node.parent.parents) and
-                     not should_skip_text(str(node), item_id)]
+                     if not should_skip_text(str(node), item_id)]
         
         if not text_nodes:
             continue
@@ -370,9 +413,6 @@ def _extract_translatable_segments(self, soup, item_id=None):
                 segments.append((text_nodes[0], None, combined_text))
                 processed_elements.add(parent_elem)
                 processed_elements.update(text_nodes)
-                with self.lock:
-                    self.total_segments += 1
-                    self.total_chars += len(combined_text)
             continue
         
         # For all other paragraph elements, join the text with proper spacing
@@ -392,16 +432,15 @@ def _extract_translatable_segments(self, soup, item_id=None):
             segments.append((filtered_nodes[0], None, full_paragraph))
             processed_elements.add(parent_elem)
             processed_elements.update(filtered_nodes)
-            with self.lock:
-                self.total_segments += 1
-                self.total_chars += len(full_paragraph)
     
     # Next, process container elements that might contain orphaned text nodes
     # but only if they contain direct text (not just child elements with text)
-    for container in soup.find_all(container_elements):
+    for container, in_skip in tags_in_order:
+        if container.name not in container_elements:
+            continue
+        
         # Skip containers that are in non-translatable areas
-        if container.name in self.SKIP_TAGS or any(parent.name in self.SKIP_TAGS 
-                                              for parent in container.parents):
+        if in_skip:
             continue
             
         # Skip already processed containers
@@ -431,21 +470,16 @@ def _extract_translatable_segments(self, soup, item_id=None):
                 if combined_text.strip() and not should_skip_text(combined_text, item_id):
                     segments.append((direct_text_nodes[0], None, combined_text))
                     processed_elements.update(direct_text_nodes)
-                    
-                    # Thread-safe increment of statistics
-                    with self.lock:
-                        self.total_segments += 1
-                        self.total_chars += len(combined_text)
     
     # Process remaining text nodes that weren't part of a paragraph or container
-    for element in soup.find_all(string=True):
+    for element, _in_skip in text_nodes_in_order:
         if element in processed_elements:
             continue
             
         parent = element.parent
         
         # Skip non-translatable elements
-        if parent.name in self.SKIP_TAGS:
+        if parent.name in skip_tags:
             continue
         
         # Skip empty text, whitespace-only text, or special content
@@ -455,23 +489,21 @@ def _extract_translatable_segments(self, soup, item_id=None):
         
         # Add to translatable segments
         segments.append((element, None, text))
-        
-        # Thread-safe increment of statistics
-        with self.lock:
-            self.total_segments += 1
-            self.total_chars += len(text)
     
     # Process translatable attributes
-    for tag in soup.find_all():
-        for attr in self.TRANSLATABLE_ATTRS:
-            if tag.has_attr(attr) and tag[attr].strip():
-                attr_text = tag[attr].strip()
+    for tag, _in_skip in tags_in_order:
+        for attr in translatable_attrs:
+            value = tag.get(attr)
+            if value and value.strip():
+                attr_text = value.strip()
                 if not should_skip_text(attr_text, item_id):
                     segments.append((tag, attr, attr_text))
-                    
-                    # Thread-safe increment of statistics
-                    with self.lock:
-                        self.total_segments += 1
-                        self.total_chars += len(attr_text)
+    
+    # Every segment counts once with the length of its text; the totals are
+    # added under the lock once per item
+    segment_chars = sum(len(segment[2]) for segment in segments)
+    with self.lock:
+        self.total_segments += len(segments)
+        self.total_chars += segment_chars
     
     return segments
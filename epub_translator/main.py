@@ -14,17 +14,17 @@ import logging
 from tqdm import tqdm
 
 # Fix imports to work both as a module and as a script
-try:
-    # When run as a module in the package
+if __package__:
+    # When run as a module in the package (python -m epub_translator)
+    from . import enable_verbose
     from .config import Config
     from .epub_processor import EPUBProcessor
     from .translator import DeepseekTranslator
     from .term_extractor import TerminologyExtractor
-except ImportError:
-    # When run as a script directly
-    import sys
-    import os
+else:
+    # When run as a script directly, make the package importable first
     sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from epub_translator import enable_verbose
     from epub_translator.config import Config
     from epub_translator.epub_processor import EPUBProcessor
     from epub_translator.translator import DeepseekTranslator
@@ -45,6 +45,8 @@ def setup_logging(log_level):
             logging.StreamHandler()
         ]
     )
+    # The package logs warnings only by default
+    enable_verbose(numeric_level)
     return logging.getLogger("epub_translator")
 
 
@@ -171,8 +173,6 @@ def main():
         
         # Initialize terminology extractor with translator for Deepseek-powered terminology
         term_extractor = TerminologyExtractor(
-            min_frequency=args.min_term_freq,
-            custom_terminology_file=args.terminology,
             use_deepseek=True,  # Enable Deepseek for terminology translation
             translator=translator  # Connect translator for terminology translation
         )
@@ -8,29 +8,30 @@ Provides paragraph-aware text chunking to ensure translation batches respect par
 
 import re
 import logging
-import nltk
 from typing import List, Tuple
 
 logger = logging.getLogger("epub_translator.paragraph_divider")
 
-# Try to ensure NLTK data is available
+# NLTK is optional: its punkt tokenizer is used when it is installed and its
+# data has been downloaded (see download_nltk.py), otherwise sentences are
+# split with a regular expression. Nothing is downloaded at import time.
 try:
+    import nltk
     nltk.data.find('tokenizers/punkt')
+    NLTK_SUPPORT = True
+except ImportError:
+    NLTK_SUPPORT = False
 except LookupError:
-    logger.warning("NLTK punkt tokenizer not found, falling back to regex-based sentence splitting")
+    logger.info("NLTK punkt tokenizer not found, using regex-based sentence splitting")
+    NLTK_SUPPORT = False
 
 class TextDivider:
     """Split text into paragraphs and create batches that respect paragraph boundaries."""
     
     def __init__(self):
         """Initialize the text divider with required resources."""
-        # Check if NLTK data is available for better sentence tokenization
-        self.use_nltk = False
-        try:
-            nltk.data.find('tokenizers/punkt')
-            self.use_nltk = True
-        except LookupError:
-            logger.warning("NLTK punkt tokenizer not available, using regex-based sentence splitting")
+        # Use NLTK for better sentence tokenization if its data is available
+        self.use_nltk = NLTK_SUPPORT
     
     def split_into_sentences(self, text: str) -> List[str]:
         """Split text into sentences using the best available method.
@@ -202,12 +203,19 @@ class TextDivider:
         
         return optimized_segments
     
-    def group_into_content_aware_batches(self, segments, batch_size: int = 10) -> List[List[Tuple]]:
+    def group_into_content_aware_batches(self, segments, batch_size: int = 10,
+                                         max_chars: int = 0) -> List[List[Tuple]]:
         """Group segments into batches that respect paragraph boundaries when possible.
         
+        Segment order is preserved. A batch is closed early when the next
+        segment would take it over max_chars, so short segments fill a
+        request and long ones do not overrun it; a single segment longer
+        than max_chars gets a batch of its own.
+        
         Args:
             segments: List of (element, attribute, text) tuples
             batch_size: Target number of segments per batch
+            max_chars: Maximum characters per batch (default: 0, no limit)
             
         Returns:
             List of batches, where each batch is a list of (element, attribute, text) tuples
@@ -221,6 +229,7 @@ class TextDivider:
         batches = []
         current_batch = []
         current_batch_size = 0
+        current_chars = 0
         i = 0
         
         while i < len(segments):
@@ -248,16 +257,26 @@ class TextDivider:
                 batches.append(current_batch)
                 current_batch = []
                 current_batch_size = 0
+                current_chars = 0
+            
+            # If this segment would make the batch too long, start a new batch
+            if max_chars and current_batch_size > 0 and current_chars + len(text) > max_chars:
+                batches.append(current_batch)
+                current_batch = []
+                current_batch_size = 0
+                current_chars = 0
             
             # Add this segment to the current batch
             current_batch.append((element, attribute, text))
             current_batch_size += 1
+            current_chars += len(text)
             
             # If we've reached batch size, start a new batch
             if current_batch_size >= batch_size:
                 batches.append(current_batch)
                 current_batch = []
                 current_batch_size = 0
+                current_chars = 0
             
             i += 1
         
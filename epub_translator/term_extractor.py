@@ -199,7 +199,7 @@ class TerminologyExtractor:
                     # Process HTML if needed
                     if path.endswith('.html'):
                         try:
-                            soup = BeautifulSoup(content, 'html.parser')
+                            soup = BeautifulSoup(content, 'lxml')
                             content = soup.get_text()
                         except Exception:
                             # Simple HTML stripping as fallback
@@ -0,0 +1,172 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Translation memory for EPUB Translator.
+Keeps translated texts in a bounded in-memory cache for the current run and
+in an SQLite database so they are reused across runs and books instead of
+being sent to the API again.
+"""
+
+import os
+import logging
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger("epub_translator.translation_store")
+
+# Database file name inside processing.cache_dir
+DEFAULT_DB_NAME = "translations.db"
+
+def _text_key(source_lang, target_lang, text):
+    """Hash a source text together with its language pair.
+    
+    Args:
+        source_lang: Source language code
+        target_lang: Target language code
+        text: Source text
+    
+    Returns:
+        16-byte BLAKE2b digest
+    """
+    return hashlib.blake2b(
+        f"{source_lang}\0{target_lang}\0{text}".encode('utf-8'), digest_size=16
+    ).digest()
+
+class TranslationCache:
+    """Thread-safe in-memory translation cache with least-recently-used
+    eviction.
+    
+    Supports the dict operations the processor uses; all of them take the
+    cache's lock, so worker threads can share one instance.
+    """
+    
+    def __init__(self, maxsize=50000):
+        """Initialize an empty cache.
+        
+        Args:
+            maxsize: Maximum number of translations kept (default: 50000)
+        """
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, text, default=None):
+        """Get the translation of a text, marking it as recently used."""
+        with self._lock:
+            try:
+                translation = self._data[text]
+            except KeyError:
+                return default
+            self._data.move_to_end(text)
+            return translation
+    
+    def __setitem__(self, text, translation):
+        with self._lock:
+            self._data[text] = translation
+            self._data.move_to_end(text)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+    
+    def __contains__(self, text):
+        with self._lock:
+            return text in self._data
+    
+    def __len__(self):
+        return len(self._data)
+    
+    def update(self, translations):
+        """Add translations from a dictionary."""
+        for text, translation in translations.items():
+            self[text] = translation
+    
+    def items(self):
+        """Get a snapshot of the cached (text, translation) pairs."""
+        with self._lock:
+            return list(self._data.items())
+
+class TranslationStore:
+    """Translations keyed by a hash of the source text and language pair.
+    
+    A single connection is shared by all translation threads and guarded by
+    a lock; each put_many() is one transaction.
+    """
+    
+    def __init__(self, path):
+        """Open or create the store.
+        
+        Args:
+            path: Path to the SQLite database file
+        """
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS translations "
+            "(src_hash BLOB PRIMARY KEY, translated TEXT NOT NULL)"
+        )
+        self._conn.commit()
+        logger.info(f"Using translation store {path}")
+    
+    def get_many(self, source_lang, target_lang, texts):
+        """Look up stored translations.
+        
+        Args:
+            source_lang: Source language code
+            target_lang: Target language code
+            texts: Source texts
+        
+        Returns:
+            Dictionary mapping each source text found to its translation
+        """
+        keys = {_text_key(source_lang, target_lang, text): text for text in texts}
+        if not keys:
+            return {}
+        
+        found = {}
+        key_list = list(keys)
+        with self._lock:
+            # Stay below SQLite's limit on bound parameters
+            for start in range(0, len(key_list), 500):
+                chunk = key_list[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT src_hash, translated FROM translations WHERE src_hash IN ({placeholders})",
+                    chunk
+                )
+                for src_hash, translated in rows:
+                    found[keys[src_hash]] = translated
+        return found
+    
+    def put_many(self, source_lang, target_lang, pairs):
+        """Store translations, replacing earlier ones for the same text.
+        
+        Args:
+            source_lang: Source language code
+            target_lang: Target language code
+            pairs: Iterable of (source text, translation) tuples
+        """
+        rows = [(_text_key(source_lang, target_lang, text), translated)
+                for text, translated in pairs]
+        if not rows:
+            return
+        
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO translations (src_hash, translated) VALUES (?, ?)",
+                    rows
+                )
+    
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
@@ -12,7 +12,7 @@ import json
 import time
 import logging
 import re
-from collections import deque
+import threading
 from tqdm import tqdm
 
 # Import for synchronous implementation
@@ -27,6 +27,55 @@ from typing import List, Dict, Tuple, Optional, Union, Any
 
 logger = logging.getLogger("epub_translator.translator")
 
+class RateLimiter:
+    """Token bucket pacing API requests below a per-minute limit.
+    
+    Safe to share between threads and between translators; each request
+    reserves the next free slot, so callers are spaced out evenly instead
+    of bursting into the server's limit and backing off.
+    """
+    
+    def __init__(self, rate_limit):
+        """Initialize the rate limiter.
+        
+        Args:
+            rate_limit: Maximum requests per minute
+        """
+        self.rate_limit = rate_limit
+        self.interval = 60 / rate_limit  # seconds between requests
+        self._tokens = 1.0
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def _reserve(self):
+        """Reserve a request slot.
+        
+        Returns:
+            Seconds the caller has to wait before sending the request
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(1.0, self._tokens + (now - self._updated) / self.interval)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0
+            return -self._tokens * self.interval
+    
+    def acquire(self):
+        """Block until a request may be sent."""
+        wait_time = self._reserve()
+        if wait_time > 0:
+            logger.debug(f"Rate limiting: sleeping for {wait_time:.2f} seconds")
+            time.sleep(wait_time)
+    
+    async def acquire_async(self):
+        """Wait without blocking the event loop until a request may be sent."""
+        wait_time = self._reserve()
+        if wait_time > 0:
+            logger.debug(f"Rate limiting: waiting for {wait_time:.2f} seconds")
+            await asyncio.sleep(wait_time)
+
 class DeepseekTranslator:
     """Translator using the Deepseek API."""
     
@@ -52,7 +101,8 @@ class DeepseekTranslator:
     
     def __init__(self, api_key, source_lang="en", target_lang="zh-CN", 
                  model="deepseek-chat", max_retries=3, timeout=30, rate_limit=10,
-                 verify_ssl=True):
+                 verify_ssl=True, session=None, rate_limiter=None,
+                 texts_per_request=0):
         """Initialize the Deepseek translator.
         
         Args:
@@ -64,6 +114,12 @@ class DeepseekTranslator:
             timeout: Timeout for API calls in seconds
             rate_limit: Maximum requests per minute
             verify_ssl: Whether to verify SSL certificate (default: True)
+            session: Shared requests.Session to send API calls through (optional).
+                A private session is created when omitted.
+            rate_limiter: Shared RateLimiter to pace requests with (optional).
+                A private limiter for rate_limit is created when omitted.
+            texts_per_request: Maximum texts sent in one batch request
+                (default: 0, the whole batch goes in one request)
         """
         self.api_key = api_key
         self.source_lang = source_lang
@@ -72,12 +128,21 @@ class DeepseekTranslator:
         self.max_retries = max_retries
         self.timeout = timeout
         self.rate_limit = rate_limit
-        self.rate_limit_interval = 60 / rate_limit  # seconds between requests
-        self.last_request_time = 0
+        self.rate_limiter = RateLimiter(rate_limit) if rate_limiter is None else rate_limiter
+        self.texts_per_request = texts_per_request
+        
+        # Created on first use by the asynchronous implementation, one aiohttp
+        # session and semaphore per event loop, as both are bound to the loop
+        # they are used on: event loop -> (session, semaphore)
+        self._async_sessions = {}
         self.translation_cache = {}
         self.api_enabled = False  # Start with API disabled until files are prepared
         self.verify_ssl = verify_ssl
         
+        # Keep connections to the API alive between requests
+        self._owns_session = session is None
+        self.session = requests.Session() if session is None else session
+        
         # Ensure API key is provided
         if not api_key:
             logger.warning("No API key provided for Deepseek API")
@@ -125,7 +190,8 @@ class DeepseekTranslator:
         # Filter out empty texts and prepare for translation
         translations = []
         texts_to_translate = []
-        indices_to_translate = []
+        # Positions of each text still to translate; repeated texts are sent once
+        indices_to_translate = {}
         
         for i, text in enumerate(texts):
             if not text.strip():
@@ -136,8 +202,10 @@ class DeepseekTranslator:
                 if cache_key in self.translation_cache:
                     translations.append(self.translation_cache[cache_key])
                 else:
-                    texts_to_translate.append(text)
-                    indices_to_translate.append(i)
+                    if text not in indices_to_translate:
+                        texts_to_translate.append(text)
+                        indices_to_translate[text] = []
+                    indices_to_translate[text].append(i)
                     # Add placeholder to keep array aligned
                     translations.append(None)
         
@@ -145,16 +213,21 @@ class DeepseekTranslator:
         if not texts_to_translate:
             return translations
         
-        # Translate the batch
-        batch_translations = self._translate_batch_texts(texts_to_translate)
+        # Translate the batch, split into requests of at most texts_per_request
+        group_size = self.texts_per_request or len(texts_to_translate)
+        batch_translations = []
+        for start in range(0, len(texts_to_translate), group_size):
+            batch_translations.extend(
+                self._translate_batch_texts(texts_to_translate[start:start + group_size])
+            )
         
         # Update translations list with results
-        for idx, trans_idx in enumerate(indices_to_translate):
-            if idx < len(batch_translations):
-                translations[trans_idx] = batch_translations[idx]
-                # Cache the translation
-                cache_key = (texts_to_translate[idx], self.source_lang, self.target_lang)
-                self.translation_cache[cache_key] = batch_translations[idx]
+        for text, translation in zip(texts_to_translate, batch_translations):
+            for trans_idx in indices_to_translate[text]:
+                translations[trans_idx] = translation
+            # Cache the translation
+            cache_key = (text, self.source_lang, self.target_lang)
+            self.translation_cache[cache_key] = translation
         
         return translations
     
@@ -325,12 +398,7 @@ class DeepseekTranslator:
             logger.warning("API call attempted before working directory preparation complete")
             return {"choices": [{"message": {"content": "API NOT ENABLED YET - Dummy response until working directory is prepared"}}]}
         # Rate limiting
-        current_time = time.time()
-        time_since_last_request = current_time - self.last_request_time
-        if time_since_last_request < self.rate_limit_interval:
-            sleep_time = self.rate_limit_interval - time_since_last_request
-            logger.debug(f"Rate limiting: sleeping for {sleep_time:.2f} seconds")
-            time.sleep(sleep_time)
+        self.rate_limiter.acquire()
         
         # Prepare request
         headers = {
@@ -348,7 +416,7 @@ class DeepseekTranslator:
         # Make request with retries
         for attempt in range(self.max_retries + 1):
             try:
-                response = requests.post(
+                response = self.session.post(
                     self.DEFAULT_ENDPOINT,
                     headers=headers,
                     data=json.dumps(data),
@@ -356,7 +424,6 @@ class DeepseekTranslator:
                     verify=self.verify_ssl
                 )
                 response.raise_for_status()
-                self.last_request_time = time.time()
                 # Log the initial response success
                 response_json = response.json()
                 logger.info(f"Received API response (status: {response.status_code})")
@@ -446,9 +513,16 @@ class DeepseekTranslator:
     #
     
     async def _ensure_async_session(self):
-        """Ensure aiohttp session exists."""
-        if not hasattr(self, '_async_session') or self._async_session is None or self._async_session.closed:
-            self._async_session = aiohttp.ClientSession(
+        """Get the aiohttp session and request semaphore of the running loop,
+        creating them on first use.
+        
+        Returns:
+            Tuple of (session, semaphore)
+        """
+        loop = asyncio.get_running_loop()
+        entry = self._async_sessions.get(loop)
+        if entry is None or entry[0].closed:
+            session = aiohttp.ClientSession(
                 timeout=aiohttp.ClientTimeout(total=self.timeout),
                 headers={
                     "Content-Type": "application/json",
@@ -462,12 +536,9 @@ class DeepseekTranslator:
                     ssl=None
                 )
             )
-        
-        if not hasattr(self, '_async_semaphore') or self._async_semaphore is None:
-            self._async_semaphore = asyncio.Semaphore(10)  # Limit concurrent requests
-            
-        if not hasattr(self, '_request_timestamps'):
-            self._request_timestamps = deque(maxlen=self.rate_limit)  # For token bucket rate limiting
+            entry = self._async_sessions[loop] = (
+                session, asyncio.Semaphore(10))  # Limit concurrent requests
+        return entry
 
     def _get_event_loop(self):
         """Get or create event loop."""
@@ -479,10 +550,10 @@ class DeepseekTranslator:
             return loop
     
     async def _close_async_session(self):
-        """Close aiohttp session."""
-        if hasattr(self, '_async_session') and self._async_session and not self._async_session.closed:
-            await self._async_session.close()
-            self._async_session = None
+        """Close the aiohttp session of the running loop."""
+        entry = self._async_sessions.pop(asyncio.get_running_loop(), None)
+        if entry is not None and not entry[0].closed:
+            await entry[0].close()
     
     def translate_text_optimized(self, text):
         """Translate a single text using optimized async implementation.
@@ -585,17 +656,33 @@ class DeepseekTranslator:
             
         # 检查循环是否在运行中
         if loop.is_running():
-            # 创建一个新的临时事件循环来执行协程
+            # 在另一个线程的临时事件循环中执行协程：同一线程中不能再运行第二个事件循环
             # 这可能会导致性能降低，但能避免嵌套事件循环的问题
-            temp_loop = asyncio.new_event_loop()
-            try:
-                return temp_loop.run_until_complete(coroutine)
-            finally:
-                temp_loop.close()
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                return executor.submit(self._run_on_temporary_loop, coroutine).result()
         else:
             # 如果循环没有运行，直接使用它
             return loop.run_until_complete(coroutine)
     
+    def _run_on_temporary_loop(self, coroutine):
+        """Run a coroutine on a new event loop, closing the loop's aiohttp
+        session along with the loop.
+        
+        Args:
+            coroutine: Coroutine to run
+        
+        Returns:
+            Result of the coroutine
+        """
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(coroutine)
+        finally:
+            # A session left bound to the closed loop could not be used or
+            # closed later
+            loop.run_until_complete(self._close_async_session())
+            loop.close()
+    
     async def _translate_single_text_async(self, text):
         """Translate a single text using Deepseek API asynchronously.
         
@@ -751,10 +838,10 @@ class DeepseekTranslator:
         if not self.api_enabled:
             logger.warning("Async API call attempted before working directory preparation complete")
             return {"choices": [{"message": {"content": "API NOT ENABLED YET - Dummy response until working directory is prepared"}}]}
-        await self._ensure_async_session()
+        session, semaphore = await self._ensure_async_session()
         
         # Apply smart rate limiting
-        await self._apply_rate_limit()
+        await self.rate_limiter.acquire_async()
         
         # Prepare request
         data = {
@@ -765,14 +852,11 @@ class DeepseekTranslator:
         }
         
         # Use semaphore to limit concurrent requests
-        async with self._async_semaphore:
+        async with semaphore:
             # Make request with retries and exponential backoff
             for attempt in range(self.max_retries + 1):
                 try:
-                    # Record request timestamp for rate limiting
-                    self._request_timestamps.append(time.time())
-                    
-                    async with self._async_session.post(
+                    async with session.post(
                         self.DEFAULT_ENDPOINT,
                         json=data
                     ) as response:
@@ -808,35 +892,18 @@ class DeepseekTranslator:
                         logger.error(f"API request failed after {self.max_retries} retries: {str(e)}")
                         raise
     
-    async def _apply_rate_limit(self):
-        """Apply smart rate limiting to avoid hitting API limits."""
-        # If we haven't made enough requests to hit the limit, proceed immediately
-        if not hasattr(self, '_request_timestamps') or len(self._request_timestamps) < self.rate_limit:
-            return
-        
-        # Calculate how long to wait based on the oldest request in our window
-        current_time = time.time()
-        oldest_request_time = self._request_timestamps[0]
-        time_since_oldest = current_time - oldest_request_time
-        
-        # If the oldest request is less than our interval window, we need to wait
-        if time_since_oldest < 60:  # 60 seconds = 1 minute
-            wait_time = 60 - time_since_oldest + 0.1  # Add a small buffer
-            logger.debug(f"Rate limiting: waiting for {wait_time:.2f} seconds")
-            await asyncio.sleep(wait_time)
-    
     def translate_texts_parallel(self, texts, batch_size=20, max_workers=5):
-        """Translate multiple texts using parallel processing for maximum throughput.
+        """Translate multiple texts using concurrent requests for maximum throughput.
         
-        This method combines both multithreading and async to maximize throughput:
+        All batches are sent from a single event loop with asyncio.gather:
         - Splits texts into batches
-        - Processes batches in parallel using ThreadPoolExecutor
-        - Each thread uses async to process its batch
+        - At most max_workers batches are in flight at a time
+        - Every request shares the translator's aiohttp connection pool
         
         Args:
             texts: List of texts to translate
-            batch_size: Size of batches to process in parallel
-            max_workers: Maximum number of worker threads
+            batch_size: Size of batches to process concurrently
+            max_workers: Maximum number of batches in flight
         
         Returns:
             List of translated texts
@@ -847,21 +914,28 @@ class DeepseekTranslator:
         # Create batches
         batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
         
-        # Function to process a single batch using async
-        def process_batch(batch):
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            try:
-                return loop.run_until_complete(self._translate_batch_texts_async(batch))
-            finally:
-                loop.close()
+        return self._safe_run_async(self._translate_batches_async(batches, max_workers))
+    
+    async def _translate_batches_async(self, batches, max_workers):
+        """Translate batches concurrently with a bounded number in flight.
+        
+        Args:
+            batches: List of batches, where each batch is a list of texts
+            max_workers: Maximum number of batches in flight
+        
+        Returns:
+            List of translated texts, in the order of the batches
+        """
+        semaphore = asyncio.Semaphore(max_workers)
+        
+        async def process_batch(batch):
+            async with semaphore:
+                return await self._translate_batch_texts_async(batch)
+        
+        batch_results = await asyncio.gather(*(process_batch(batch) for batch in batches))
         
-        # Use ThreadPoolExecutor to process batches in parallel
-        results = []
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            batch_results = list(executor.map(process_batch, batches))
-            
         # Combine results
+        results = []
         for batch_result in batch_results:
             results.extend(batch_result)
         
@@ -869,6 +943,10 @@ class DeepseekTranslator:
     
     def cleanup(self):
         """Clean up resources."""
-        if hasattr(self, '_async_session') and self._async_session:
-            loop = self._get_event_loop()
-            loop.run_until_complete(self._close_async_session())
+        for loop, (session, _) in list(self._async_sessions.items()):
+            # Sessions of loops that are closed or busy elsewhere are dropped
+            if not session.closed and not loop.is_closed() and not loop.is_running():
+                loop.run_until_complete(session.close())
+        self._async_sessions.clear()
+        if self._owns_session:
+            self.session.close()
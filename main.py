@@ -21,9 +21,9 @@ import logging
 import time
 from pathlib import Path
 from tqdm import tqdm
-import pytz
 
 # Import our modules
+from epub_translator import enable_verbose
 from epub_translator.config import Config
 from epub_translator.epub_processor import EPUBProcessor
 from epub_translator.translator import DeepseekTranslator
@@ -44,6 +44,8 @@ def setup_logging(log_level):
             logging.StreamHandler()
         ]
     )
+    # The package logs warnings only by default
+    enable_verbose(numeric_level)
     return logging.getLogger("epub_translator")
 
 
@@ -121,6 +123,13 @@ def parse_arguments():
         action="store_true"
     )
     
+    parser.add_argument(
+        "--cache-db",
+        help="Path to the database keeping translations between runs "
+             "(default: translations.db in the configured cache_dir)",
+        default=None
+    )
+    
     parser.add_argument(
         "--log-level", 
         help="Logging level (default: info)",
@@ -168,6 +177,8 @@ def main():
             config.set('processing', 'max_parallel_requests', str(args.max_workers))
         if args.chunk_size:
             config.set('processing', 'chunk_size', str(args.chunk_size))
+        if args.cache_db:
+            config.set('processing', 'cache_db', args.cache_db)
         
         # Check if we need DeepSeek API for the requested phase
         api_needed = args.phase in ["terminology", "translate", "all"]
@@ -219,7 +230,8 @@ def main():
             max_workers=config.getint('processing', 'max_parallel_requests'),
             chunk_size=config.getint('processing', 'chunk_size'),
             config=config,
-            local_only=(args.phase == "prepare")
+            local_only=(args.phase == "prepare"),
+            max_batch_chars=config.getint('processing', 'max_batch_chars')
         )
         
         # -------------------------------------------------------------------
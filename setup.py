@@ -26,7 +26,7 @@ setup(
         "Topic :: Text Processing :: Linguistic",
         "Topic :: Utilities"
     ],
-    python_requires=">=3.6",
+    python_requires=">=3.7",
     install_requires=requirements,
     entry_points={
         "console_scripts": [